@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Token
+from .models import IngestRun, QuarantinedPair, Token
 
 @admin.register(Token)
 class TokenAdmin(admin.ModelAdmin):
@@ -9,3 +9,21 @@ class TokenAdmin(admin.ModelAdmin):
     search_fields = ['name', 'symbol', 'pair_address']
     ordering = ['-analysis_score']
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(IngestRun)
+class IngestRunAdmin(admin.ModelAdmin):
+    list_display = ['chain', 'trigger', 'status', 'started_at', 'duration',
+                   'rows', 'inserted', 'updated', 'unchanged']
+    list_filter = ['chain', 'status', 'trigger']
+    ordering = ['-started_at']
+    readonly_fields = [f.name for f in IngestRun._meta.fields]
+
+
+@admin.register(QuarantinedPair)
+class QuarantinedPairAdmin(admin.ModelAdmin):
+    list_display = ['pair_address', 'chain_id', 'reason', 'received_at']
+    list_filter = ['chain_id']
+    search_fields = ['pair_address', 'reason']
+    ordering = ['-received_at']
+    readonly_fields = [f.name for f in QuarantinedPair._meta.fields]
@@ -0,0 +1,86 @@
+from .scoring import analyze_columns
+
+
+class TokenAnalyzer:
+    @staticmethod
+    def calculate_analysis_score(token_data):
+        """Calculate analysis score based on multiple metrics"""
+        return TokenAnalyzer.score_metrics(
+            float(token_data.get('volume', {}).get('h24', 0)),
+            float(token_data.get('priceChange', {}).get('h24', 0)),
+            float(token_data.get('liquidity', {}).get('usd', 0)),
+            float(token_data.get('marketCap', 0)),
+        )
+
+    @staticmethod
+    def score_metrics(volume_24h, price_change_24h, liquidity, market_cap):
+        """Calculate analysis score from already parsed metrics"""
+        score = 0
+        
+        # Volume score (0-30 points)
+        if volume_24h > 1_000_000:  # > 1M
+            score += 30
+        elif volume_24h > 100_000:  # > 100K
+            score += 20
+        elif volume_24h > 10_000:  # > 10K
+            score += 10
+        
+        # Price change score (0-25 points)
+        if 0 < price_change_24h <= 20:  # Positive but not too high
+            score += 25
+        elif -5 <= price_change_24h < 0:  # Small negative
+            score += 15
+        elif price_change_24h > 20:  # Too high, risky
+            score += 5
+        
+        # Liquidity score (0-25 points)
+        if liquidity > 500_000:  # > 500K
+            score += 25
+        elif liquidity > 100_000:  # > 100K
+            score += 15
+        elif liquidity > 50_000:  # > 50K
+            score += 10
+        
+        # Market cap score (0-20 points)
+        if 1_000_000 <= market_cap <= 100_000_000:  # 1M-100M sweet spot
+            score += 20
+        elif market_cap > 100_000_000:  # > 100M
+            score += 15
+        elif market_cap > 100_000:  # > 100K
+            score += 10
+        
+        return min(score, 100)  # Cap at 100
+    
+    @staticmethod
+    def get_recommendation(score, price_change_24h):
+        """Get buy/hold/avoid recommendation"""
+        if score >= 70 and price_change_24h > -10:
+            return 'BUY'
+        elif score >= 40:
+            return 'HOLD'
+        else:
+            return 'AVOID'
+    
+    @staticmethod
+    def calculate_volatility_index(token_data):
+        """Calculate volatility index"""
+        return TokenAnalyzer.volatility_from_changes(
+            float(token_data.get('priceChange', {}).get('h1', 0)),
+            float(token_data.get('priceChange', {}).get('h6', 0)),
+            float(token_data.get('priceChange', {}).get('h24', 0)),
+        )
+
+    @staticmethod
+    def volatility_from_changes(change_1h, change_6h, change_24h):
+        """Calculate volatility index from already parsed price changes"""
+        price_changes = [abs(change_1h), abs(change_6h), abs(change_24h)]
+        return sum(price_changes) / len([x for x in price_changes if x > 0]) if any(price_changes) else 0
+
+    @staticmethod
+    def analyze_batch(volume_24h, price_change_1h, price_change_6h, price_change_24h,
+                      liquidity, market_cap, rules=None):
+        """Vectorized score/recommendation/volatility for columns of N pairs"""
+        return analyze_columns(
+            volume_24h, price_change_1h, price_change_6h, price_change_24h,
+            liquidity, market_cap, rules,
+        )
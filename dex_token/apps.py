@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class DexTokenConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dex_token'
+
+    def ready(self):
+        # Instruments every database connection for the request metrics
+        from . import metrics  # noqa: F401
@@ -0,0 +1,555 @@
+"""Offline benchmarks for the ingest and read paths.
+
+Every benchmark runs against a throwaway test database so the project
+database is never touched. Run them through ``manage.py benchmark``.
+"""
+import json
+import random
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.db import connection
+
+from .analysis import TokenAnalyzer
+from .decoder import decode_pairs
+from .models import Token
+from .services import bulk_upsert_tokens, upsert_token
+
+RECORDED_PAYLOAD = Path(__file__).resolve().parent / 'testdata' / 'dexscreener_search_bsc.json'
+DECODE_TARGET_PER_SEC = 50_000
+
+# Deterministic Token rows generated in the database; far faster than the
+# ORM for the million-row fixtures the read-path checks need. Decimals are
+# rounded so they compare equal to the values Django reads back.
+TOKEN_FIXTURE_SQL = """
+WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < %s)
+INSERT INTO dex_token_token (
+    name, symbol, pair_address, token_address, price_usd, market_cap, volume_24h, liquidity,
+    price_change_24h, recommendation, analysis_score, volatility_index, created_at, updated_at
+)
+SELECT 'Token ' || i, 'TK' || (i %% 50000), '0xP' || i, '0xT' || i, ROUND((i %% 997) / 100.0, 2),
+       (i * 1299709) %% 900000000, (i * 104729) %% 5000000, (i * 7919) %% 2000000,
+       ROUND(((i * 15485863) %% 10000) / 100.0 - 50, 2),
+       CASE WHEN i %% 100 = 0 THEN 'BUY' WHEN i %% 3 = 0 THEN 'HOLD' ELSE 'AVOID' END,
+       ROUND(((i * 7919) %% 10000) / 100.0, 2), 0, '2026-01-01 00:00:00', '2026-01-01 00:00:00'
+FROM seq
+"""
+
+
+def recorded_pairs():
+    """Load the recorded /search payload shipped with the tests"""
+    with open(RECORDED_PAYLOAD) as f:
+        return json.load(f)['pairs']
+
+
+def synthetic_pairs(count, seed=0, chain='bsc'):
+    """Generate Dexscreener-shaped pair payloads"""
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(count):
+        price = rng.uniform(0.0001, 50)
+        pairs.append({
+            'chainId': chain,
+            'dexId': rng.choice(['pancakeswap', 'biswap', 'apeswap']),
+            'pairAddress': f'0x{seed:04x}{i:036x}',
+            'baseToken': {
+                'address': f'0xb{seed:03x}{i:036x}',
+                'name': f'Token {i}',
+                'symbol': f'TK{i}',
+            },
+            'priceNative': f'{price / 600:.10f}',
+            'priceUsd': f'{price:.8f}',
+            'txns': {'h24': {'buys': rng.randint(0, 5000), 'sells': rng.randint(0, 5000)}},
+            'volume': {'h24': rng.uniform(0, 5_000_000)},
+            'priceChange': {
+                'h1': round(rng.uniform(-10, 10), 2),
+                'h6': round(rng.uniform(-20, 20), 2),
+                'h24': round(rng.uniform(-40, 40), 2),
+            },
+            'liquidity': {'usd': rng.uniform(0, 2_000_000)},
+            'fdv': rng.randint(10_000, 500_000_000),
+            'marketCap': rng.randint(10_000, 500_000_000),
+            'pairCreatedAt': 1_700_000_000_000 + i * 1000,
+            'info': {
+                'imageUrl': f'https://example.com/{i}.png',
+                'websites': [{'url': f'https://token{i}.example.com'}],
+                'socials': [{'platform': 'twitter', 'handle': f'tk{i}'}],
+            },
+        })
+    return pairs
+
+
+@contextmanager
+def isolated_database():
+    """Create a test database for the duration of a benchmark"""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def fill_tokens(rows):
+    """Insert rows synthetic tokens and refresh the planner statistics"""
+    with connection.cursor() as cursor:
+        cursor.execute(TOKEN_FIXTURE_SQL, [rows])
+        cursor.execute('ANALYZE')
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def bench_ingest(sizes=(50, 1_000, 10_000)):
+    """Compare the per-row update_or_create loop with bulk_upsert_tokens.
+
+    Each size is measured on an empty table (all inserts), again on the
+    populated table with fresh prices (all updates) and once more with the
+    same payload (nothing to write).
+    """
+    results = []
+    for size in sizes:
+        first, second = synthetic_pairs(size, seed=1), synthetic_pairs(size, seed=1)
+        for pair in second:
+            pair['priceUsd'] = str(float(pair['priceUsd']) * 1.01)
+
+        for mode in ('per_row', 'bulk'):
+            Token.objects.all().delete()
+            for phase, pairs in (('insert', first), ('update', second), ('unchanged', second)):
+                if mode == 'per_row':
+                    elapsed, _ = _timed(lambda: [upsert_token(p) for p in pairs])
+                else:
+                    elapsed, _ = _timed(bulk_upsert_tokens, pairs)
+                results.append({
+                    'size': size,
+                    'mode': mode,
+                    'phase': phase,
+                    'seconds': round(elapsed, 4),
+                    'pairs_per_sec': round(size / elapsed) if elapsed else None,
+                })
+    Token.objects.all().delete()
+    return results
+
+
+def bench_copy(sizes=(1_000, 10_000, 50_000), per_row_limit=10_000):
+    """Compare ORM writes with COPY ingestion; PostgreSQL only.
+
+    Phases as in bench_ingest. Modes are the per-row loop (up to
+    per_row_limit pairs), the ORM bulk path (INGEST_COPY off) and COPY into
+    a staging table merged with one INSERT ... ON CONFLICT.
+    """
+    from django.test import override_settings
+
+    if connection.vendor != 'postgresql':
+        raise RuntimeError('The copy benchmark needs PostgreSQL; set DATABASE_URL')
+    results = []
+    for size in sizes:
+        first, second = synthetic_pairs(size, seed=1), synthetic_pairs(size, seed=1)
+        for pair in second:
+            pair['priceUsd'] = str(float(pair['priceUsd']) * 1.01)
+
+        for mode in ('per_row', 'orm_bulk', 'copy'):
+            if mode == 'per_row' and size > per_row_limit:
+                continue
+            Token.objects.all().delete()
+            with override_settings(INGEST_COPY=mode == 'copy'):
+                for phase, pairs in (('insert', first), ('update', second), ('unchanged', second)):
+                    if mode == 'per_row':
+                        elapsed, _ = _timed(lambda: [upsert_token(p) for p in pairs])
+                    else:
+                        elapsed, _ = _timed(bulk_upsert_tokens, pairs)
+                    results.append({
+                        'size': size,
+                        'mode': mode,
+                        'phase': phase,
+                        'seconds': round(elapsed, 4),
+                        'pairs_per_sec': round(size / elapsed) if elapsed else None,
+                    })
+    Token.objects.all().delete()
+    return results
+
+
+def bench_decode(sizes=(50_000,)):
+    """Decode throughput over the recorded payload, repeated up to each size"""
+    payload = recorded_pairs()
+    results = []
+    for size in sizes:
+        pairs = (payload * (size // len(payload) + 1))[:size]
+        decode_pairs(pairs[:1000])  # warm up
+        elapsed, records = _timed(decode_pairs, pairs)
+        rate = round(size / elapsed) if elapsed else None
+        results.append({
+            'size': size,
+            'records': len(records),
+            'seconds': round(elapsed, 4),
+            'pairs_per_sec': rate,
+            'meets_target': bool(rate and rate >= DECODE_TARGET_PER_SEC),
+        })
+    return results
+
+
+def metric_columns(count, seed=0):
+    """Random metric columns with a share of values exactly on the thresholds"""
+    rng = random.Random(seed)
+    edges = [0, -5, -10, 20, 10_000, 50_000, 100_000, 500_000, 1_000_000, 100_000_000]
+    def value(low, high):
+        return rng.choice(edges) if rng.random() < 0.1 else rng.uniform(low, high)
+    return {
+        'volume_24h': [value(0, 3_000_000) for _ in range(count)],
+        'price_change_1h': [value(-15, 15) for _ in range(count)],
+        'price_change_6h': [value(-30, 30) for _ in range(count)],
+        'price_change_24h': [value(-50, 50) for _ in range(count)],
+        'liquidity': [value(0, 1_000_000) for _ in range(count)],
+        'market_cap': [value(0, 300_000_000) for _ in range(count)],
+    }
+
+
+def bench_scoring(sizes=(100_000,)):
+    """Scalar TokenAnalyzer loop vs the vectorized batch API"""
+    import numpy as np
+
+    results = []
+    for size in sizes:
+        columns = metric_columns(size)
+        arrays = {name: np.asarray(values) for name, values in columns.items()}
+
+        def scalar():
+            out = []
+            for i in range(size):
+                score = TokenAnalyzer.score_metrics(
+                    columns['volume_24h'][i], columns['price_change_24h'][i],
+                    columns['liquidity'][i], columns['market_cap'][i],
+                )
+                out.append((
+                    score,
+                    TokenAnalyzer.get_recommendation(score, columns['price_change_24h'][i]),
+                    TokenAnalyzer.volatility_from_changes(
+                        columns['price_change_1h'][i], columns['price_change_6h'][i], columns['price_change_24h'][i],
+                    ),
+                ))
+            return out
+
+        for mode, func in (('scalar', scalar), ('batch', lambda: TokenAnalyzer.analyze_batch(**arrays))):
+            elapsed, _ = _timed(func)
+            results.append({
+                'size': size,
+                'mode': mode,
+                'seconds': round(elapsed, 4),
+                'pairs_per_sec': round(size / elapsed) if elapsed else None,
+            })
+    return results
+
+
+def bench_pagination(sizes=(200_000,), pages=(1, 10, 100, 1_000, 10_000), repeat=5):
+    """Per-page latency of /api/tokens/ in page-number and keyset mode.
+
+    Keyset cursors for deep pages are built from the row ending the
+    previous page, so no time goes into walking there.
+    """
+    from statistics import median
+
+    from django.conf import settings
+    from django.test import Client, override_settings
+
+    from .pagination import encode_cursor
+
+    page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+    client = Client()
+    results = []
+    for size in sizes:
+        Token.objects.all().delete()
+        fill_tokens(size)
+        ordered = Token.objects.order_by('-analysis_score', '-id').values_list('analysis_score', 'id')
+        for page in pages:
+            if (page - 1) * page_size >= size:
+                continue
+            params = {'page-number': {'page': page}, 'keyset': {'pagination': 'cursor'}}
+            if page > 1:
+                value, pk = ordered[(page - 1) * page_size - 1]
+                params['keyset']['cursor'] = encode_cursor('-analysis_score', value, pk)
+            for mode, query in params.items():
+                timings = []
+                with override_settings(ALLOWED_HOSTS=['testserver']):
+                    for _ in range(repeat):
+                        elapsed, response = _timed(client.get, '/api/tokens/', query)
+                        assert response.status_code == 200, response.content[:200]
+                        timings.append(elapsed)
+                results.append({
+                    'size': size,
+                    'mode': mode,
+                    'page': page,
+                    'ms_per_page': round(median(timings) * 1000, 2),
+                })
+    Token.objects.all().delete()
+    return results
+
+
+def _peak_memory(func):
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_serialization(sizes=(1_000,), repeat=5):
+    """Latency and peak memory of an N-row JSON response.
+
+    Compares the ModelSerializers with the values() encoder behind the API,
+    for the full detail fields, the list fields and a sparse ?fields= set.
+    """
+    from statistics import median
+
+    from rest_framework.renderers import JSONRenderer
+
+    from .serializers import TokenListSerializer, TokenSerializer, get_values_encoder
+
+    renderer = JSONRenderer()
+    results = []
+    for size in sizes:
+        Token.objects.all().delete()
+        fill_tokens(size)
+        queryset = Token.objects.order_by('-analysis_score')[:size]
+        cases = [
+            ('detail', TokenSerializer, None),
+            ('list', TokenListSerializer, None),
+            ('sparse', TokenListSerializer, 'id,symbol,price_usd'),
+        ]
+        for fieldset, serializer_class, requested in cases:
+            encoder = get_values_encoder(serializer_class)
+            names = encoder.select(requested)
+            modes = {
+                'values': lambda: renderer.render(encoder.encode(queryset.values(*names), names)),
+                'serializer': lambda: renderer.render(serializer_class(queryset.all(), many=True).data),
+            }
+            if requested:
+                modes['serializer'] = lambda: renderer.render([
+                    {name: item[name] for name in names}
+                    for item in serializer_class(queryset.all(), many=True).data
+                ])
+            for mode, func in modes.items():
+                func()  # warm up
+                timings = [_timed(func)[0] for _ in range(repeat)]
+                results.append({
+                    'size': size,
+                    'fields': fieldset,
+                    'mode': mode,
+                    'ms': round(median(timings) * 1000, 2),
+                    'peak_kib': round(_peak_memory(func) / 1024),
+                })
+    Token.objects.all().delete()
+    return results
+
+
+async def simulated_sse_client(app, query, on_event, disconnect, on_open=None):
+    """One EventSource-like client driven straight through the ASGI app"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': '/api/stream/', 'raw_path': b'/api/stream/',
+        'query_string': query.encode(), 'root_path': '', 'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] != 'http.response.body':
+            return
+        body = message.get('body', b'')
+        if body.startswith(b'retry:') and on_open is not None:
+            on_open()
+        if b'event: token' in body:
+            on_event(message['body'])
+
+    await app(scope, receive, send)
+
+
+def bench_live(sizes=(10_000,), tokens=100, timeout=60):
+    """Fan-out of one ingest to N idle /api/stream/ clients in one worker.
+
+    Clients subscribe round-robin to a single token, a recommendation
+    bucket or everything. Reports connect time, memory per idle client
+    (tracemalloc), and the time from the ingest commit until every client
+    has its events.
+    """
+    import asyncio
+    import tracemalloc
+
+    from asgiref.sync import sync_to_async
+    from django.core.asgi import get_asgi_application
+    from django.test import override_settings
+
+    from .live import get_broadcaster
+
+    pairs = synthetic_pairs(tokens, seed=7)
+    bulk_upsert_tokens(pairs)
+    token_ids = list(Token.objects.values_list('id', flat=True))
+    app = get_asgi_application()
+
+    async def run(size):
+        disconnect = asyncio.Event()
+        received = [0] * size
+        opened = [0]
+        queries = [
+            f'token={token_ids[i % len(token_ids)]}' if i % 3 == 0
+            else 'recommendation=BUY,HOLD,AVOID' if i % 3 == 1
+            else ''
+            for i in range(size)
+        ]
+
+        def counter(i):
+            def on_event(body):
+                received[i] += body.count(b'event: token')
+            return on_event
+
+        def on_open():
+            opened[0] += 1
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        clients = [asyncio.create_task(simulated_sse_client(app, queries[i], counter(i), disconnect, on_open))
+                   for i in range(size)]
+        # Connected once the stream is open and the broadcaster has its starting point
+        while opened[0] < size or get_broadcaster().last_id is None:
+            await asyncio.sleep(0.05)
+        broadcaster = get_broadcaster()
+        connect_seconds = time.perf_counter() - start
+        per_client = (tracemalloc.get_traced_memory()[0] - baseline) / size
+        tracemalloc.stop()
+
+        # Every token changes price once: each client expects one event,
+        # except the unfiltered and bucket ones, which get all of them
+        for pair in pairs:
+            pair['priceUsd'] = str(float(pair['priceUsd']) * 1.05)
+        expected = [1 if i % 3 == 0 else len(token_ids) for i in range(size)]
+        start = time.perf_counter()
+        await sync_to_async(bulk_upsert_tokens)(pairs)
+        deadline = start + timeout
+        while received != expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        fanout_seconds = time.perf_counter() - start
+
+        disconnect.set()
+        await asyncio.wait_for(asyncio.gather(*clients), timeout)
+        return {
+            'clients': size,
+            'connect_seconds': round(connect_seconds, 2),
+            'kib_per_idle_client': round(per_client / 1024, 1),
+            'events_delivered': sum(received),
+            'events_expected': sum(expected),
+            'fanout_seconds': round(fanout_seconds, 3),
+            'subscriptions_left': len(broadcaster.subscriptions),
+        }
+
+    results = []
+    with override_settings(LIVE_POLL_INTERVAL=0.05):
+        for size in sizes:
+            results.append(asyncio.run(run(size)))
+    Token.objects.all().delete()
+    return results
+
+
+def simulated_search(responses, latency):
+    """fetch_many stand-in serving canned responses after a fixed latency"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def search(query):
+        time.sleep(latency)
+        return responses.get(query)
+
+    def fetch(queries, max_in_flight=None):
+        with ThreadPoolExecutor(max_workers=max_in_flight or 2) as executor:
+            yield from zip(queries, executor.map(search, queries))
+
+    return fetch
+
+
+def bench_crawl(sizes=(2_000, 10_000), chains=('BSC', 'ETH'), page=30, latency=0.1, shards=8):
+    """Crawl of N pairs per chain with one shard at a time vs CRAWL_PARALLEL_SHARDS.
+
+    Like the real search, every query returns at most `page` pairs, and
+    consecutive queries overlap by a third so the crawl has to dedupe.
+    Upstream latency is simulated; each run starts from an empty table.
+    """
+    from django.conf import settings
+    from django.test import override_settings
+
+    from .crawler import chain_id, crawl
+
+    results = []
+    for size in sizes:
+        responses, seed_map = {}, {}
+        step = page * 2 // 3
+        for number, chain in enumerate(chains):
+            pairs = synthetic_pairs(size, seed=number + 1, chain=chain_id(chain))
+            names = [f'{chain}-{start}' for start in range(0, size, step)]
+            for name, start in zip(names, range(0, size, step)):
+                responses[name] = {'pairs': pairs[start:start + page]}
+            seed_map[chain] = names
+        queries = len(responses)
+
+        for parallel in sorted({1, settings.CRAWL_PARALLEL_SHARDS}):
+            Token.objects.all().delete()
+            with override_settings(CRAWL_SEEDS=seed_map):
+                elapsed, report = _timed(
+                    crawl, list(chains), fetch=simulated_search(responses, latency), depth=1,
+                    max_queries=queries, shard_seeds=-(-queries // len(chains) // shards), parallel=parallel,
+                )
+            reports = [shard for result in report.values() for shard in result['shards']]
+            write_seconds = sum(shard['write_seconds'] for shard in reports)
+            results.append({
+                'pairs_per_chain': size,
+                'queries': queries,
+                'shards': len(reports),
+                'parallel': parallel,
+                'fetched': sum(shard['fetched'] for shard in reports),
+                'written': sum(shard['written'] for shard in reports),
+                'fetch_seconds': round(elapsed - write_seconds, 2),
+                'write_seconds': round(write_seconds, 2),
+                'seconds': round(elapsed, 2),
+            })
+    Token.objects.all().delete()
+    return results
+
+
+def bench_replay(sizes=(2_000,)):
+    """Ingest entry points against the local Dexscreener stand-in; see dex_token.replay"""
+    from .replay import replay_ingest
+
+    return [{'size': size, **row} for size in sizes for row in replay_ingest(size)]
+
+
+def bench_routes(sizes=(10_000, 100_000, 1_000_000), requests=200, concurrency=8):
+    """Latency percentiles and queries per request of every route; see dex_token.routes"""
+    from .routes import bench_routes as run
+
+    return run(sizes, requests, concurrency)
+
+
+BENCHMARKS = {
+    'ingest': bench_ingest,
+    'copy': bench_copy,
+    'decode': bench_decode,
+    'scoring': bench_scoring,
+    'pagination': bench_pagination,
+    'serialization': bench_serialization,
+    'live': bench_live,
+    'crawl': bench_crawl,
+    'replay': bench_replay,
+    'routes': bench_routes,
+}
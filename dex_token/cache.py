@@ -0,0 +1,152 @@
+"""TTL cache for upstream token searches.
+
+Search responses are cached by normalized query. Queries upstream has no
+pairs for are cached too, with a shorter negative TTL, so repeated
+misspellings do not go back to Dexscreener every time. Transport errors
+are never cached. The backend is either a bounded in-process LRU or any
+Django cache alias, so entries can be shared across workers.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+MISSING = object()
+
+DEFAULT_SEARCH_CACHE = {
+    'BACKEND': 'local',
+    'ALIAS': 'default',
+    'MAX_ENTRIES': 1024,
+    'TTL': 60,
+    'NEGATIVE_TTL': 15,
+}
+
+
+class LocalTTLCache:
+    """Bounded LRU cache whose entries also expire after a TTL"""
+
+    def __init__(self, max_entries, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DjangoCacheBackend:
+    """Entries stored in a Django cache alias, shared by every worker using it"""
+    PREFIX = 'dex_token:search:'
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+        self.evictions = 0  # Eviction is up to the cache server
+
+    def _key(self, key):
+        # Memcached rejects spaces and long keys
+        return self.PREFIX + hashlib.sha1(key.encode()).hexdigest()
+
+    def get(self, key):
+        return self.cache.get(self._key(key), MISSING)
+
+    def set(self, key, value, ttl):
+        self.cache.set(self._key(key), value, ttl)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class SearchCache:
+    def __init__(self, backend, ttl, negative_ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = self.misses = self.negative_hits = 0
+
+    @staticmethod
+    def normalize(query):
+        return ' '.join(str(query).split()).casefold()
+
+    def get_or_fetch(self, query, fetch):
+        """Return the cached response for query, or fetch() and cache it.
+
+        fetch() returns the decoded response, or None on a transport error.
+        """
+        key = self.normalize(query)
+        value = self.backend.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            if not value.get('pairs'):
+                self.negative_hits += 1
+            return value
+
+        self.misses += 1
+        value = fetch()
+        if value is not None:
+            self.backend.set(key, value, self.ttl if value.get('pairs') else self.negative_ttl)
+        return value
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'negative_hits': self.negative_hits,
+            'evictions': self.backend.evictions,
+        }
+
+    def clear(self):
+        self.backend.clear()
+
+
+_search_cache = None
+
+
+def get_search_cache():
+    """Process-wide SearchCache built from settings.SEARCH_CACHE"""
+    global _search_cache
+    if _search_cache is None:
+        options = {**DEFAULT_SEARCH_CACHE, **getattr(settings, 'SEARCH_CACHE', {})}
+        if options['BACKEND'] == 'django':
+            backend = DjangoCacheBackend(options['ALIAS'])
+        else:
+            backend = LocalTTLCache(options['MAX_ENTRIES'])
+        _search_cache = SearchCache(backend, options['TTL'], options['NEGATIVE_TTL'])
+    return _search_cache
+
+
+@receiver(setting_changed)
+def _reset_search_cache(setting, **kwargs):
+    global _search_cache
+    if setting == 'SEARCH_CACHE':
+        _search_cache = None
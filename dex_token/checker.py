@@ -0,0 +1,143 @@
+"""Token checker lookups that never hold a request on upstream.
+
+check() answers from the database whenever any stored token matches. When
+that match was updated more than CHECKER_STALE_SECONDS ago, it also starts a
+background refresh and returns without waiting for it. On a true miss it
+waits at most CHECKER_DEADLINE seconds for the upstream lookup. If the
+lookup is still running then, check() reports it as pending, and the page
+polls /api/checker/ until it finishes.
+
+Upstream lookups (services.fetch_and_analyze_token) run on a small thread
+pool in each worker process. They are keyed by search type and
+case-folded query, so concurrent searches for the same query share one
+lookup. A query is refreshed at most once per staleness window.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, models
+from django.utils import timezone
+
+from .cache import MISSING, LocalTTLCache
+from .models import Token
+from .upstream import upstream_available
+
+FOUND = 'found'
+PENDING = 'pending'
+NOT_FOUND = 'not_found'
+UNAVAILABLE = 'unavailable'
+
+
+def best_match(queryset):
+    """Highest scoring row of a case-insensitive lookup, like Token's default ordering.
+
+    Every match is ranked in Python on its ranking columns alone: ordering
+    them in SQL would force a temp B-tree sort on top of the index range
+    scan. Only the winner is then loaded in full.
+    """
+    ranked = queryset.order_by().values_list('analysis_score', 'volume_24h', 'pk')
+    best = max(ranked, default=None)
+    return Token.objects.filter(pk=best[-1]).order_by().first() if best else None
+
+
+def find_stored(search_query, search_type):
+    """Best stored match for a checker search, or None"""
+    if search_type == 'address':
+        return best_match(Token.objects.filter(
+            models.Q(token_address__iexact=search_query) |
+            models.Q(pair_address__iexact=search_query)
+        ))
+    # Exact symbol hits use the case-insensitive index; substring name
+    # matches can only be found by scanning, so they come last
+    return (
+        best_match(Token.objects.filter(symbol__iexact=search_query))
+        or Token.objects.filter(name__icontains=search_query).first()
+    )
+
+
+def is_stale(token):
+    seconds = settings.CHECKER_STALE_SECONDS
+    return bool(seconds) and timezone.now() - token.updated_at > timedelta(seconds=seconds)
+
+
+def _lookup(search_query, search_type):
+    from .services import fetch_and_analyze_token
+    try:
+        return fetch_and_analyze_token(search_query, search_type)
+    finally:
+        # Pool threads live on: release the connection like the end of a request
+        close_old_connections()
+
+
+class Lookups:
+    """Upstream lookups of one worker process, at most one in flight per query"""
+
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='checker')
+        self.in_flight = {}
+        self.refreshed = LocalTTLCache(max_entries=4096)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(search_query, search_type):
+        return search_type, search_query.casefold()
+
+    def start(self, search_query, search_type):
+        """Future of the lookup for this query, joining one already in flight"""
+        key = self.key(search_query, search_type)
+        with self._lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                return future
+            future = self.in_flight[key] = self.executor.submit(_lookup, search_query, search_type)
+        future.add_done_callback(lambda done: self._finished(key, done))
+        return future
+
+    def _finished(self, key, future):
+        with self._lock:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+
+    def refresh(self, search_query, search_type):
+        """Start a lookup in the background unless this query was refreshed recently"""
+        key = self.key(search_query, search_type)
+        if self.refreshed.get(key) is not MISSING:
+            return None
+        self.refreshed.set(key, True, settings.CHECKER_STALE_SECONDS)
+        return self.start(search_query, search_type)
+
+
+_lookups = None
+_lookups_lock = threading.Lock()
+
+
+def get_lookups():
+    """Process-wide Lookups sized by CHECKER_WORKERS"""
+    global _lookups
+    with _lookups_lock:
+        if _lookups is None:
+            _lookups = Lookups(settings.CHECKER_WORKERS)
+        return _lookups
+
+
+async def check(search_query, search_type):
+    """(status, token, from_database) of a checker search; see the module docstring"""
+    token = await sync_to_async(find_stored)(search_query, search_type)
+    if token is not None:
+        if is_stale(token) and upstream_available():
+            get_lookups().refresh(search_query, search_type)
+        return FOUND, token, True
+    if not upstream_available():
+        return UNAVAILABLE, None, False
+
+    lookup = asyncio.wrap_future(get_lookups().start(search_query, search_type))
+    try:
+        # shield(): a request giving up must not cancel the shared lookup
+        token = await asyncio.wait_for(asyncio.shield(lookup), settings.CHECKER_DEADLINE)
+    except asyncio.TimeoutError:
+        return PENDING, None, False
+    return (FOUND, token, False) if token is not None else (NOT_FOUND, None, False)
@@ -0,0 +1,224 @@
+"""Multi-chain crawler for Dexscreener pairs.
+
+A crawl covers the chains in settings.CRAWL_SEEDS. Each chain's seed
+queries are split into shards of CRAWL_SHARD_SEEDS seeds, and the shards
+of every chain are fetched in parallel (CRAWL_PARALLEL_SHARDS at a time).
+A shard searches its seeds and then, for every further level of
+CRAWL_DEPTH, the base tokens discovered by the level before, up to
+CRAWL_MAX_QUERIES searches. Only pairs on the shard's chain are kept.
+
+Pairs found under several queries or shards are merged by pair address
+before a chain is written, one bulk_upsert_tokens call per shard. Every
+shard reports its queries, fetched and written pairs, upsert counts and
+timings; ingest runs keep them on IngestRun.shards.
+
+fetch is anything with the signature of DexscreenerService.fetch_many, so
+RecordedResponses replays a saved crawl offline and ResponseRecorder saves
+one.
+"""
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+
+from .metrics import stage, upstream_failed
+from .services import DexscreenerService, bulk_upsert_tokens
+
+logger = logging.getLogger(__name__)
+
+# Scheduler chain names whose Dexscreener chainId is not just the lowercase name
+CHAIN_IDS = {
+    'ETH': 'ethereum',
+    'SOL': 'solana',
+    'ARB': 'arbitrum',
+    'MATIC': 'polygon',
+    'AVAX': 'avalanche',
+}
+
+
+def chain_id(chain):
+    """Dexscreener chainId for a scheduler chain name, e.g. ETH -> ethereum"""
+    return CHAIN_IDS.get(chain.upper(), chain.lower())
+
+
+def chain_seeds(chain):
+    """Seed queries of a chain; the chain name alone when none are configured"""
+    return settings.CRAWL_SEEDS.get(chain.upper()) or [chain]
+
+
+class Shard:
+    """One independently fetched slice of a chain's seeds"""
+    __slots__ = ('chain', 'index', 'seeds', 'pairs', 'queries', 'failed', 'fetched',
+                 'fetch_seconds', 'error')
+
+    def __init__(self, chain, index, seeds):
+        self.chain = chain
+        self.index = index
+        self.seeds = seeds
+        self.pairs = {}
+        self.queries = self.failed = self.fetched = 0
+        self.fetch_seconds = 0.0
+        self.error = ''
+
+    @property
+    def name(self):
+        return f'{self.chain}#{self.index}'
+
+    def __repr__(self):
+        return f'<Shard {self.name} {len(self.seeds)} seeds>'
+
+
+def plan_shards(chains, shard_seeds=None):
+    """Split each chain's seeds into shards of shard_seeds queries"""
+    shard_seeds = shard_seeds or settings.CRAWL_SHARD_SEEDS
+    shards = []
+    for chain in chains:
+        seeds = list(dict.fromkeys(chain_seeds(chain)))
+        for index, start in enumerate(range(0, len(seeds), shard_seeds)):
+            shards.append(Shard(chain, index, seeds[start:start + shard_seeds]))
+    return shards
+
+
+@stage('fetch')
+def crawl_shard(shard, fetch, depth=None, max_queries=None):
+    """Fetch a shard's pairs into shard.pairs, keyed by pair address"""
+    depth = depth or settings.CRAWL_DEPTH
+    max_queries = max_queries or settings.CRAWL_MAX_QUERIES
+    wanted = chain_id(shard.chain)
+    start = time.perf_counter()
+    queried = set()
+    level = shard.seeds
+    for _ in range(depth):
+        level = [query for query in dict.fromkeys(level) if query not in queried][:max_queries - len(queried)]
+        if not level:
+            break
+        queried.update(level)
+        discovered = []
+        for query, data in fetch(level):
+            shard.queries += 1
+            pairs = data.get('pairs') if isinstance(data, dict) else None
+            if not isinstance(pairs, list):
+                shard.failed += 1
+                continue
+            for pair in pairs:
+                if not isinstance(pair, dict) or str(pair.get('chainId', '')).lower() != wanted:
+                    continue
+                shard.fetched += 1
+                address = pair.get('pairAddress')
+                if address and address not in shard.pairs:
+                    shard.pairs[address] = pair
+                    base = pair.get('baseToken')
+                    if isinstance(base, dict) and base.get('address'):
+                        discovered.append(base['address'])
+        level = discovered
+    shard.fetch_seconds = time.perf_counter() - start
+    return shard
+
+
+def write_chain(shards):
+    """Write a chain's shards, each pair once; None if every query failed.
+
+    Returns the inserted/updated/unchanged totals and a report per shard.
+    """
+    totals = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    reports = []
+    written = set()
+    for shard in shards:
+        unique = [pair for address, pair in shard.pairs.items() if address not in written]
+        written.update(shard.pairs)
+        start = time.perf_counter()
+        stats = bulk_upsert_tokens(unique) if unique else dict.fromkeys(totals, 0)
+        for key in totals:
+            totals[key] += stats[key]
+        reports.append({
+            'shard': shard.name,
+            'seeds': len(shard.seeds),
+            'queries': shard.queries,
+            'failed': shard.failed,
+            'fetched': shard.fetched,
+            'written': len(unique),
+            **stats,
+            'fetch_seconds': round(shard.fetch_seconds, 3),
+            'write_seconds': round(time.perf_counter() - start, 3),
+            'error': shard.error,
+        })
+    if not any(shard.queries > shard.failed for shard in shards):
+        return None
+    return dict(totals, shards=reports)
+
+
+def fetch_shards(shards, fetch=None, depth=None, max_queries=None, parallel=None):
+    """Fetch shards in parallel; a failing shard keeps its error and what it fetched"""
+    fetch = fetch or DexscreenerService.fetch_many
+    with ThreadPoolExecutor(max_workers=parallel or settings.CRAWL_PARALLEL_SHARDS) as executor:
+        futures = {
+            executor.submit(crawl_shard, shard, fetch, depth, max_queries): shard
+            for shard in shards
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                shard = futures[future]
+                shard.error = str(e) or e.__class__.__name__
+                upstream_failed('crawl_shard', e)
+                logger.warning('Crawling shard %s failed: %s', shard.name, shard.error)
+    return shards
+
+
+def crawl(chains=None, fetch=None, depth=None, max_queries=None, shard_seeds=None, parallel=None):
+    """Crawl chains with their shards fetched in parallel.
+
+    Returns {chain: write_chain() result}; chains default to CRAWL_SEEDS.
+    """
+    chains = chains or list(settings.CRAWL_SEEDS)
+    shards = fetch_shards(plan_shards(chains, shard_seeds), fetch, depth, max_queries, parallel)
+    # Writes stay on this thread, one chain and shard at a time
+    return {chain: write_chain([shard for shard in shards if shard.chain == chain]) for chain in chains}
+
+
+def collect_pairs(chain, fetch=None, depth=None):
+    """Deduplicated raw pairs of one chain without writing them; None if every query failed"""
+    shards = fetch_shards(plan_shards([chain]), fetch, depth)
+    if not any(shard.queries > shard.failed for shard in shards):
+        return None
+    pairs = {}
+    for shard in shards:
+        for address, pair in shard.pairs.items():
+            pairs.setdefault(address, pair)
+    return list(pairs.values())
+
+
+class RecordedResponses:
+    """fetch_many stand-in replaying {query: payload} recorded earlier"""
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def __call__(self, queries, max_in_flight=None):
+        for query in queries:
+            yield query, self.responses.get(query)
+
+
+class ResponseRecorder:
+    """Wraps a fetch_many and keeps every response for RecordedResponses"""
+
+    def __init__(self, fetch=None):
+        self.fetch = fetch or DexscreenerService.fetch_many
+        self.responses = {}
+
+    def __call__(self, queries, max_in_flight=None):
+        for query, data in self.fetch(queries, max_in_flight):
+            self.responses[query] = data
+            yield query, data
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.responses, f)
@@ -0,0 +1,188 @@
+"""Schema-driven decoder for Dexscreener pair payloads.
+
+A raw pair dict is turned into a slotted PairRecord in a single pass: every
+nested object is looked up once and each field goes through a converter
+chosen when the module is imported. Both ingest paths build their Token
+values from these records.
+"""
+import math
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+
+from .analysis import TokenAnalyzer
+from .scoring import scorers
+
+ZERO = Decimal('0')
+BUY_POSITION_SIZE = Decimal('5.0')
+DEFAULT_POSITION_SIZE = Decimal('2.0')
+_EMPTY = {}
+
+
+def to_float(value):
+    """Convert an upstream number or numeric string to a finite float"""
+    if value.__class__ is float:
+        return value if math.isfinite(value) else 0.0
+    if value is None or value == '':
+        return 0.0
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if math.isfinite(value) else 0.0
+
+
+def to_decimal(value):
+    """Convert an upstream number to Decimal without a float round-trip"""
+    kind = value.__class__
+    if kind is str:
+        try:
+            result = Decimal(value)
+        except InvalidOperation:
+            return ZERO
+        return result if result.is_finite() else ZERO
+    if kind is int:
+        return Decimal(value)
+    if kind is float:
+        return Decimal(repr(value)) if math.isfinite(value) else ZERO
+    return ZERO if value is None else to_decimal(str(value))
+
+
+def to_optional_int(value):
+    return int(to_float(value)) if value else None
+
+
+def to_text(value):
+    return value if value is None or value.__class__ is str else str(value)
+
+
+def to_timestamp(value):
+    if not value:
+        return None
+    return datetime.fromtimestamp(to_float(value) / 1000, tz=timezone.utc)
+
+
+# (parent key, key, record slot, converter, default when missing).
+# A parent of None reads from the pair itself. Scoring inputs are decoded as
+# floats and narrowed to the integer columns once the score is computed.
+PAIR_SCHEMA = [
+    (None, 'pairAddress', 'pair_address', to_text, ''),
+    (None, 'chainId', 'chain_id', to_text, None),
+    (None, 'dexId', 'dex_id', to_text, None),
+    (None, 'priceUsd', 'price_usd', to_decimal, 0),
+    (None, 'priceNative', 'price_native', to_decimal, 0),
+    (None, 'marketCap', 'market_cap', to_float, 0),
+    (None, 'fdv', 'fdv', to_optional_int, None),
+    (None, 'pairCreatedAt', 'pair_created_at', to_timestamp, None),
+    ('baseToken', 'name', 'name', to_text, 'Unknown'),
+    ('baseToken', 'symbol', 'symbol', to_text, 'UNK'),
+    ('baseToken', 'address', 'token_address', to_text, None),
+    ('volume', 'h24', 'volume_24h', to_float, 0),
+    ('liquidity', 'usd', 'liquidity', to_float, 0),
+    ('info', 'imageUrl', 'image_url', to_text, None),
+]
+
+# Derived from the same pass: socials, websites, transactions and analysis
+DERIVED_SLOTS = (
+    'price_change_1h', 'price_change_24h', 'buys_24h', 'sells_24h', 'website_url',
+    'twitter_handle', 'telegram_handle', 'discord_handle',
+    'recommendation', 'analysis_score', 'volatility_index',
+    'stop_loss_level', 'suggested_position_size',
+)
+
+SOCIAL_SLOTS = {
+    'twitter': 'twitter_handle',
+    'telegram': 'telegram_handle',
+    'discord': 'discord_handle',
+}
+
+
+def _compile(schema):
+    """Generate one straight-line extractor for the whole schema.
+
+    Each nested dict is fetched once, and every field becomes a get,
+    default and converter call written directly into the record slot.
+    """
+    namespace = {'_EMPTY': _EMPTY, 'dict': dict}
+    lines = ['def _extract(pair, record):']
+    sources = {None: 'pair'}
+    for index, (parent, key, slot, converter, default) in enumerate(schema):
+        if parent not in sources:
+            name = sources[parent] = f'src{len(sources)}'
+            lines.append(f'    {name} = pair.get({parent!r})')
+            lines.append(f'    if {name}.__class__ is not dict: {name} = _EMPTY')
+        namespace[f'conv{index}'] = converter
+        namespace[f'default{index}'] = default
+        lines.append(f'    value = {sources[parent]}.get({key!r})')
+        lines.append(f'    record.{slot} = conv{index}(default{index} if value is None else value)')
+    exec('\n'.join(lines), namespace)
+    return namespace['_extract']
+
+
+_extract = _compile(PAIR_SCHEMA)
+
+
+class PairRecord:
+    """Decoded Token values for one Dexscreener pair"""
+    __slots__ = tuple(entry[2] for entry in PAIR_SCHEMA) + DERIVED_SLOTS
+
+    # Token model columns; pair_address is the upsert key
+    FIELDS = tuple(slot for slot in __slots__ if slot != 'pair_address')
+
+    def defaults(self):
+        """Field values for Token.objects.update_or_create(defaults=...)"""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return f'<PairRecord {self.pair_address} {self.symbol}>'
+
+
+def decode_pair(pair_data):
+    """Decode a raw pair dict into a PairRecord, or None without a base token address"""
+    record = PairRecord()
+    _extract(pair_data, record)
+    if not record.token_address:
+        return None
+
+    price_change = pair_data.get('priceChange')
+    if not isinstance(price_change, dict):
+        price_change = _EMPTY
+    change_1h = to_float(price_change.get('h1'))
+    change_6h = to_float(price_change.get('h6'))
+    change_24h = to_float(price_change.get('h24'))
+    record.price_change_1h = Decimal(repr(change_1h))
+    record.price_change_24h = Decimal(repr(change_24h))
+
+    txns = (pair_data.get('txns') or _EMPTY).get('h24') or _EMPTY
+    record.buys_24h = txns.get('buys')
+    record.sells_24h = txns.get('sells')
+
+    info = pair_data.get('info') or _EMPTY
+    websites = info.get('websites') or ()
+    record.website_url = websites[0].get('url') if websites else None
+    record.twitter_handle = record.telegram_handle = record.discord_handle = None
+    for social in info.get('socials') or ():
+        slot = SOCIAL_SLOTS.get(social.get('platform'))
+        if slot and getattr(record, slot) is None:
+            setattr(record, slot, social.get('handle'))
+
+    score_pair, recommend_pair = scorers()
+    score = score_pair(record.volume_24h, change_24h, record.liquidity, record.market_cap)
+    record.recommendation = recommend_pair(score, change_24h, record.volume_24h, record.liquidity, record.market_cap)
+    record.volume_24h = int(record.volume_24h)
+    record.liquidity = int(record.liquidity)
+    record.market_cap = int(record.market_cap)
+    record.analysis_score = Decimal(score)
+    record.volatility_index = Decimal(repr(float(TokenAnalyzer.volatility_from_changes(change_1h, change_6h, change_24h))))
+    record.stop_loss_level = Decimal(repr(to_float(pair_data.get('priceUsd')) * 0.9))
+    record.suggested_position_size = BUY_POSITION_SIZE if record.recommendation == 'BUY' else DEFAULT_POSITION_SIZE
+    return record
+
+
+def decode_pairs(pairs):
+    """Decode a list of pairs, dropping the ones without a base token address"""
+    records = []
+    for pair_data in pairs:
+        record = decode_pair(pair_data)
+        if record is not None:
+            records.append(record)
+    return records
@@ -0,0 +1,95 @@
+"""Streaming export of the Token table as NDJSON or CSV.
+
+Rows are read in primary-key order with a chunked server-side iterator and
+encoded as they arrive, so memory stays flat however large the table is.
+The whole export runs in one read transaction, giving a consistent
+snapshot even while an ingest commits: REPEATABLE READ on PostgreSQL, and
+SQLite's read transaction, which sees a single database state.
+
+Under ASGI a synchronous iterator in a StreamingHttpResponse is read into a
+list before the first byte is sent, so views serve ASGI requests from
+astream_export(), which produces the same chunks one at a time.
+"""
+import csv
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+
+from .models import Token
+from .serializers import TokenSerializer, get_values_encoder
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+FILTER_FIELDS = ('recommendation', 'symbol')
+CHUNK_SIZE = 2000
+
+
+def export_queryset(filters=None):
+    """Tokens to export, in primary-key order; filters use FILTER_FIELDS"""
+    filters = {key: value for key, value in (filters or {}).items() if key in FILTER_FIELDS and value}
+    return Token.objects.filter(**filters).order_by('pk')
+
+
+def _encode_ndjson(rows, names):
+    dumps = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+    return ''.join(dumps(row) + '\n' for row in rows)
+
+
+def _encode_csv(rows, names):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([['' if row[name] is None else row[name] for name in names] for row in rows])
+    return buffer.getvalue()
+
+
+def export_fields(fields=None):
+    """TokenSerializer field names for a ?fields= style list; all by default.
+
+    Raises ValidationError for unknown fields.
+    """
+    return get_values_encoder(TokenSerializer).select(fields)
+
+
+def stream_export(queryset, fmt='ndjson', names=None, chunk_size=CHUNK_SIZE):
+    """Yield the export of queryset as text chunks of chunk_size rows"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    encoder = get_values_encoder(TokenSerializer)
+    names = names or encoder.select()
+    encode = _encode_ndjson if fmt == 'ndjson' else _encode_csv
+
+    if fmt == 'csv':
+        yield ','.join(names) + '\r\n'
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        rows = queryset.values(*names).iterator(chunk_size=chunk_size)
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield encode(encoder.encode(chunk, names), names)
+                chunk = []
+        if chunk:
+            yield encode(encoder.encode(chunk, names), names)
+
+
+async def astream_export(queryset, fmt='ndjson', names=None, chunk_size=CHUNK_SIZE):
+    """stream_export as an async iterator.
+
+    Every chunk is produced on the request's thread, which holds the export
+    transaction until the iterator is exhausted or closed.
+    """
+    chunks = stream_export(queryset, fmt, names, chunk_size)
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
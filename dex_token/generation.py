@@ -0,0 +1,57 @@
+"""Data generation counter for conditional GETs and live streams.
+
+Every write that changes what the token pages and APIs return rebuilds the
+dashboard snapshot (summary.refresh_snapshot), which increments
+DashboardSnapshot.generation and stamps refreshed_at in the same
+transaction. Views derive ETag and Last-Modified from that row, and the
+live broadcaster polls it. Because it lives in the database, every app
+host and Celery worker sharing the database sees the same generation.
+
+Each process keeps the row for GENERATION_CACHE_SECONDS, so a burst of
+polls that find the data unchanged is answered with 304s without any
+database query. A process forgets it as soon as it writes a new generation
+itself; other hosts see the change within the cache window.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import DashboardSnapshot
+
+EMPTY = {'generation': 0, 'updated_at': None}
+
+_cache = {'expires_at': 0.0, 'state': None}
+
+
+def forget_generation():
+    """Drop this process's cached generation, now and once the current transaction commits"""
+    _cache['state'] = None
+    transaction.on_commit(_forget)
+
+
+def _forget():
+    _cache['state'] = None
+
+
+def current_state():
+    """{'generation': n, 'updated_at': aware datetime or None}"""
+    now = time.monotonic()
+    if _cache['state'] is None or now >= _cache['expires_at']:
+        row = (
+            DashboardSnapshot.objects.filter(pk=DashboardSnapshot.SINGLETON_ID)
+            .values_list('generation', 'refreshed_at')
+            .first()
+        )
+        state = {'generation': row[0], 'updated_at': row[1]} if row else EMPTY
+        _cache['state'], _cache['expires_at'] = state, now + settings.GENERATION_CACHE_SECONDS
+    return _cache['state']
+
+
+def current_generation():
+    return current_state()['generation']
+
+
+def last_modified():
+    """Time of the last generation, or None before the first one"""
+    return current_state()['updated_at']
@@ -0,0 +1,211 @@
+"""Price history: append-only snapshots and OHLC rollups.
+
+Every ingest appends one PricePoint per pair. Rollups then build candles
+hierarchically (points -> 5m -> 1h -> 1d), each run only revisiting
+buckets from the last one it built, so the work per run stays proportional
+to new data rather than table size. Reads are per-token range scans on
+(token, timestamp) or (token, interval, bucket_start).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Candle, PricePoint, Token
+from .writer import write
+
+INTERVAL_SECONDS = {
+    Candle.FIVE_MINUTES: 5 * 60,
+    Candle.HOUR: 60 * 60,
+    Candle.DAY: 24 * 60 * 60,
+}
+# Each interval is rolled up from the next finer one; 5m reads raw points
+ROLLUP_SOURCE = {
+    Candle.FIVE_MINUTES: None,
+    Candle.HOUR: Candle.FIVE_MINUTES,
+    Candle.DAY: Candle.HOUR,
+}
+BATCH_SIZE = 1000
+# Candles kept in memory by a rollup before the finished ones are written
+CANDLE_CHUNK = 10_000
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+PRICE_CHANGE_LIMIT = Decimal('999999.9999')
+
+
+def bucket_start(timestamp, interval):
+    """Start of the UTC bucket containing timestamp"""
+    seconds = int(timestamp.timestamp())
+    return datetime.fromtimestamp(seconds - seconds % INTERVAL_SECONDS[interval], tz=dt_timezone.utc)
+
+
+def append_price_points(rows, observed_at=None):
+    """Bulk append (token_id, price_usd, volume_24h, liquidity) snapshots"""
+    observed_at = observed_at or timezone.now()
+    PricePoint.objects.bulk_create(
+        [
+            PricePoint(token_id=token_id, timestamp=observed_at, price_usd=price_usd,
+                       volume_24h=volume_24h, liquidity=liquidity)
+            for token_id, price_usd, volume_24h, liquidity in rows
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def _source_rows(interval, since):
+    """(token_id, timestamp, open, high, low, close, volume_24h, samples) in time order"""
+    source = ROLLUP_SOURCE[interval]
+    if source is None:
+        points = (
+            PricePoint.objects.filter(timestamp__gte=since)
+            .order_by('timestamp')
+            .values_list('token_id', 'timestamp', 'price_usd', 'volume_24h')
+        )
+        for token_id, timestamp, price, volume in points.iterator(chunk_size=5000):
+            yield token_id, timestamp, price, price, price, price, volume, 1
+    else:
+        yield from (
+            Candle.objects.filter(interval=source, bucket_start__gte=since)
+            .order_by('bucket_start')
+            .values_list('token_id', 'bucket_start', 'open', 'high', 'low', 'close', 'volume_24h', 'samples')
+            .iterator(chunk_size=5000)
+        )
+
+
+def _write_candles(interval, candles):
+    Candle.objects.bulk_create(
+        [
+            Candle(token_id=token_id, interval=interval, bucket_start=start, open=o, high=h,
+                   low=l, close=c, volume_24h=volume, samples=samples)
+            for (token_id, start), (o, h, l, c, volume, samples) in candles.items()
+        ],
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['token', 'interval', 'bucket_start'],
+        update_fields=['open', 'high', 'low', 'close', 'volume_24h', 'samples'],
+    )
+
+
+def rollup(interval, since=None):
+    """Build or refresh candles for interval from since onwards.
+
+    By default it resumes at the newest bucket already built, which may
+    have been partial. Finished buckets are written in chunks through the
+    single-writer queue as the source rows stream by. Returns the number of
+    candles written.
+    """
+    if since is None:
+        since = Candle.objects.filter(interval=interval).aggregate(last=Max('bucket_start'))['last'] or EPOCH
+    since = bucket_start(since, interval)
+
+    # Rows arrive in time order, so the first row of a bucket is its open,
+    # the last one its close, and every bucket before the current row's is
+    # complete
+    candles = {}
+    written = 0
+    for token_id, timestamp, o, h, l, c, volume, samples in _source_rows(interval, since):
+        start = bucket_start(timestamp, interval)
+        if len(candles) >= CANDLE_CHUNK:
+            done = {key: candle for key, candle in candles.items() if key[1] < start}
+            if done:
+                write(_write_candles, interval, done)
+                written += len(done)
+                candles = {key: candle for key, candle in candles.items() if key[1] >= start}
+        key = (token_id, start)
+        candle = candles.get(key)
+        if candle is None:
+            candles[key] = [o, h, l, c, volume, samples]
+        else:
+            candle[1] = max(candle[1], h)
+            candle[2] = min(candle[2], l)
+            candle[3] = c
+            candle[4] = volume
+            candle[5] += samples
+
+    if candles:
+        write(_write_candles, interval, candles)
+        written += len(candles)
+    return written
+
+
+def _write_price_change_7d(tokens):
+    Token.objects.bulk_update(tokens, ['price_change_7d', 'updated_at'], batch_size=500)
+
+
+def update_price_change_7d(now=None):
+    """Set Token.price_change_7d from the 1h close nearest to a week ago, BATCH_SIZE tokens at a time.
+
+    Only tokens whose change differs from the stored one are written, and
+    changes are published only if any was, so a rollup that finds no new
+    prices leaves updated_at and the data generation alone. Returns the
+    number of tokens written.
+    """
+    now = now or timezone.now()
+    target = now - timedelta(days=7)
+    reference = dict(
+        Candle.objects.filter(
+            interval=Candle.HOUR,
+            bucket_start__gt=target - timedelta(hours=6),
+            bucket_start__lte=target,
+        )
+        .order_by('bucket_start')
+        .values_list('token_id', 'close')
+    )
+    token_ids = [token_id for token_id, base in reference.items() if base]
+    updated = 0
+    for i in range(0, len(token_ids), BATCH_SIZE):
+        tokens = []
+        batch = Token.objects.filter(id__in=token_ids[i:i + BATCH_SIZE]).only('id', 'price_usd', 'price_change_7d')
+        for token in batch:
+            base = reference[token.id]
+            change = (token.price_usd - base) / base * 100
+            change = max(-PRICE_CHANGE_LIMIT, min(PRICE_CHANGE_LIMIT, change)).quantize(Decimal('0.0001'))
+            if change == token.price_change_7d:
+                continue
+            token.price_change_7d = change
+            token.updated_at = now
+            tokens.append(token)
+        if tokens:
+            write(_write_price_change_7d, tokens)
+            updated += len(tokens)
+    if updated:
+        from .services import publish_changes
+        publish_changes()
+    return updated
+
+
+def rollup_all(now=None):
+    """Run every rollup in dependency order, then refresh 7d changes"""
+    written = {interval: rollup(interval) for interval in ROLLUP_SOURCE}
+    written['price_change_7d'] = update_price_change_7d(now)
+    return written
+
+
+def pick_interval(start, end):
+    """Coarsest useful resolution for a chart spanning start..end"""
+    span = end - start
+    if span <= timedelta(hours=6):
+        return None
+    if span <= timedelta(days=2):
+        return Candle.FIVE_MINUTES
+    if span <= timedelta(days=60):
+        return Candle.HOUR
+    return Candle.DAY
+
+
+def price_history(token_id, start, end, interval=None):
+    """A token's history between start and end.
+
+    interval=None returns raw snapshots; otherwise candles of that interval.
+    """
+    if interval is None:
+        return list(
+            PricePoint.objects.filter(token_id=token_id, timestamp__gte=start, timestamp__lte=end)
+            .order_by('timestamp')
+            .values('timestamp', 'price_usd', 'volume_24h', 'liquidity')
+        )
+    return list(
+        Candle.objects.filter(token_id=token_id, interval=interval, bucket_start__gte=start, bucket_start__lte=end)
+        .order_by('bucket_start')
+        .values('bucket_start', 'open', 'high', 'low', 'close', 'volume_24h')
+    )
@@ -0,0 +1,275 @@
+"""Live push of token changes over Server-Sent Events.
+
+Ingestion records what changed per token (only the LIVE_FIELDS that moved)
+as TokenChange rows in the same transaction as the write, then bumps the
+data generation. Each ASGI worker runs one Broadcaster: a single task
+watches the generation, loads the new changes with one query and fans
+them out to the matching subscriptions. An idle connection is an
+asyncio.Queue in a few dicts, so thousands of them cost no CPU.
+
+Event ids are TokenChange ids, so a reconnecting EventSource resumes
+from Last-Event-ID. Changes are kept for LIVE_CHANGE_RETENTION seconds.
+
+Ids are handed out when a row is inserted, not when it commits, so on
+PostgreSQL concurrent ingests can commit them out of order. The broadcaster
+remembers the ids it skipped over and keeps looking for them for
+LIVE_LATE_COMMIT_SECONDS, dispatching each change once.
+"""
+import asyncio
+import json
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .generation import current_generation
+from .models import TokenChange
+from .serializers import TokenSerializer, get_values_encoder
+
+LIVE_FIELDS = (
+    'price_usd', 'price_change_1h', 'price_change_24h', 'volume_24h',
+    'liquidity', 'market_cap', 'recommendation', 'analysis_score',
+)
+CLOSE = object()
+HEARTBEAT = ': keepalive\n\n'
+REPLAY_LIMIT = 1000
+
+
+def encode_changes(values):
+    """Changed values in the API representation, e.g. decimals as strings"""
+    names = [name for name in LIVE_FIELDS if name in values]
+    return get_values_encoder(TokenSerializer).encode([values], names)[0]
+
+
+def publish_token_changes(changes):
+    """Store (token_id, previous recommendation, recommendation, changed values) for live streams.
+
+    Call inside the ingest transaction; changes older than the retention
+    window are pruned at the same time.
+    """
+    now = timezone.now()
+    TokenChange.objects.bulk_create(
+        [
+            TokenChange(
+                token_id=token_id,
+                recommendation=recommendation,
+                previous_recommendation=previous or '',
+                changes=encode_changes(values),
+                created_at=now,
+            )
+            for token_id, previous, recommendation, values in changes
+        ],
+        batch_size=500,
+    )
+    retention = timedelta(seconds=settings.LIVE_CHANGE_RETENTION)
+    TokenChange.objects.filter(created_at__lt=now - retention).delete()
+
+
+def changes_since(last_id, token_ids=None, buckets=None, limit=REPLAY_LIMIT, gaps=()):
+    """TokenChanges after last_id or in gaps ((first, last) id ranges), optionally filtered, oldest first"""
+    condition = Q(id__gt=last_id)
+    for first, last in gaps:
+        condition |= Q(id__range=(first, last))
+    queryset = TokenChange.objects.filter(condition).order_by('id')
+    if token_ids:
+        queryset = queryset.filter(token_id__in=token_ids)
+    if buckets:
+        queryset = queryset.filter(Q(recommendation__in=buckets) | Q(previous_recommendation__in=buckets))
+    return list(queryset.values('id', 'token_id', 'recommendation', 'previous_recommendation',
+                                'changes', 'created_at')[:limit])
+
+
+def latest_change_id():
+    return TokenChange.objects.aggregate(last=Max('id'))['last'] or 0
+
+
+def format_event(change):
+    data = {
+        'id': change['token_id'],
+        'recommendation': change['recommendation'],
+        'changes': change['changes'],
+        'at': change['created_at'].isoformat(),
+    }
+    return f"id: {change['id']}\nevent: token\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscription:
+    __slots__ = ('queue', 'token_ids', 'buckets')
+
+    def __init__(self, token_ids=None, buckets=None, max_queue=None):
+        self.queue = asyncio.Queue(max_queue or settings.LIVE_QUEUE_SIZE)
+        self.token_ids = frozenset(token_ids or ())
+        self.buckets = frozenset(buckets or ())
+
+    def matches(self, change):
+        if self.token_ids and change['token_id'] not in self.token_ids:
+            return False
+        if self.buckets:
+            return change['recommendation'] in self.buckets or change['previous_recommendation'] in self.buckets
+        return True
+
+    def offer(self, item):
+        """Queue a list of (event id, message) pairs; False if the client fell too far behind"""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+
+class Broadcaster:
+    """Fans TokenChanges out to every subscription in this worker"""
+
+    def __init__(self, poll_interval=None, heartbeat=None):
+        self.poll_interval = poll_interval or settings.LIVE_POLL_INTERVAL
+        self.heartbeat = heartbeat or settings.LIVE_HEARTBEAT_SECONDS
+        self.subscriptions = set()
+        # Subscriptions indexed by their most selective filter
+        self.by_token = defaultdict(set)
+        self.by_bucket = defaultdict(set)
+        self.unfiltered = set()
+        self.last_id = None
+        # (first, last) id ranges skipped by the polls so far -> monotonic deadline
+        self.gaps = {}
+        self.task = None
+
+    def subscribe(self, token_ids=None, buckets=None):
+        subscription = Subscription(token_ids, buckets)
+        self.subscriptions.add(subscription)
+        if subscription.token_ids:
+            for token_id in subscription.token_ids:
+                self.by_token[token_id].add(subscription)
+        elif subscription.buckets:
+            for bucket in subscription.buckets:
+                self.by_bucket[bucket].add(subscription)
+        else:
+            self.unfiltered.add(subscription)
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.watch())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscriptions.discard(subscription)
+        self.unfiltered.discard(subscription)
+        for index, keys in ((self.by_token, subscription.token_ids), (self.by_bucket, subscription.buckets)):
+            for key in keys:
+                index[key].discard(subscription)
+                if not index[key]:
+                    del index[key]
+
+    def _drop(self, subscription):
+        # Too far behind: end its stream; the client reconnects with Last-Event-ID
+        self.unsubscribe(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(CLOSE)
+
+    def dispatch(self, changes):
+        """Queue changes for the matching subscriptions; returns how many got events.
+
+        Each subscription gets one queue item (and one write) per batch,
+        however many of the changes it matches.
+        """
+        batches = defaultdict(list)
+        for change in changes:
+            candidates = set(self.unfiltered)
+            candidates.update(self.by_token.get(change['token_id'], ()))
+            candidates.update(self.by_bucket.get(change['recommendation'], ()))
+            candidates.update(self.by_bucket.get(change['previous_recommendation'], ()))
+            event = (change['id'], format_event(change))
+            for subscription in candidates:
+                if subscription.matches(change):
+                    batches[subscription].append(event)
+        for subscription, events in batches.items():
+            if not subscription.offer(events):
+                self._drop(subscription)
+        return len(batches)
+
+    async def poll(self):
+        """Dispatch changes committed since the last poll"""
+        now = time.monotonic()
+        self.gaps = {gap: deadline for gap, deadline in self.gaps.items() if deadline > now}
+        changes = await sync_to_async(changes_since)(self.last_id, gaps=list(self.gaps))
+        if changes:
+            self.dispatch(changes)
+            self.advance([change['id'] for change in changes], now + settings.LIVE_LATE_COMMIT_SECONDS)
+        return len(changes)
+
+    def advance(self, ids, deadline):
+        """Move last_id past ascending ids, remembering the ids skipped on the way"""
+        for change_id in ids:
+            if change_id <= self.last_id:
+                self._fill(change_id)
+                continue
+            if change_id > self.last_id + 1:
+                self.gaps[(self.last_id + 1, change_id - 1)] = deadline
+            self.last_id = change_id
+
+    def _fill(self, change_id):
+        # A late commit showed up: split its gap around it
+        for (first, last), deadline in self.gaps.items():
+            if first <= change_id <= last:
+                del self.gaps[(first, last)]
+                if first < change_id:
+                    self.gaps[(first, change_id - 1)] = deadline
+                if change_id < last:
+                    self.gaps[(change_id + 1, last)] = deadline
+                return
+
+    async def watch(self):
+        # Generation first: a change committed between the two reads is
+        # picked up by the first poll instead of being skipped
+        generation = await sync_to_async(current_generation)()
+        self.last_id = await sync_to_async(latest_change_id)()
+        loop = asyncio.get_running_loop()
+        next_heartbeat = loop.time() + self.heartbeat
+        while self.subscriptions:
+            await asyncio.sleep(self.poll_interval)
+            latest = await sync_to_async(current_generation)()
+            if latest != generation:
+                generation = latest
+                # A generation can carry more changes than one query returns
+                while await self.poll() >= REPLAY_LIMIT:
+                    pass
+            if loop.time() >= next_heartbeat:
+                next_heartbeat = loop.time() + self.heartbeat
+                for subscription in list(self.subscriptions):
+                    if not subscription.offer([(None, HEARTBEAT)]):
+                        self._drop(subscription)
+
+
+_broadcasters = {}
+
+
+def get_broadcaster():
+    """The Broadcaster of the running event loop, one per worker"""
+    loop = asyncio.get_running_loop()
+    broadcaster = _broadcasters.get(loop)
+    if broadcaster is None:
+        _broadcasters.clear()
+        broadcaster = _broadcasters[loop] = Broadcaster()
+    return broadcaster
+
+
+async def stream_events(subscription, broadcaster, replay=()):
+    """SSE text for a subscription: the replayed changes, then live ones"""
+    replayed = set()
+    try:
+        yield f'retry: {settings.LIVE_RETRY_MS}\n\n'
+        for change in replay:
+            replayed.add(change['id'])
+            yield format_event(change)
+        while True:
+            item = await subscription.queue.get()
+            if item is CLOSE:
+                return
+            # Skip what the replay already sent; late commits can have lower ids
+            text = ''.join(message for event_id, message in item if event_id not in replayed)
+            if text:
+                yield text
+    finally:
+        broadcaster.unsubscribe(subscription)
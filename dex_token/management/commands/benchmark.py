@@ -0,0 +1,87 @@
+import inspect
+import json
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from dex_token.benchmarks import BENCHMARKS, isolated_database
+
+# Result fields that say what was measured rather than how it went
+IDENTITY_FIELDS = (
+    'size', 'pairs_per_chain', 'clients', 'scenario', 'run', 'mode', 'phase', 'page', 'fields',
+    'parallel', 'route', 'method', 'concurrency',
+)
+
+class Command(BaseCommand):
+    help = 'Run an offline performance benchmark against a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=sorted(BENCHMARKS))
+        parser.add_argument('--sizes', nargs='+', type=int, help='Override the default input sizes')
+        parser.add_argument('--requests', type=int, help='Requests per route (routes benchmark)')
+        parser.add_argument('--concurrency', type=int, help='Concurrent clients (routes benchmark)')
+        parser.add_argument('--json', action='store_true', help='Print raw JSON results')
+        parser.add_argument('--output', help='Save the results as JSON to this file')
+        parser.add_argument('--compare', help='Show the change from results saved earlier with --output')
+
+    def handle(self, *args, **options):
+        target = options['target']
+        bench = BENCHMARKS[target]
+        kwargs = {'sizes': options['sizes']} if options['sizes'] else {}
+        parameters = inspect.signature(bench).parameters
+        for name in ('requests', 'concurrency'):
+            if options[name] is not None:
+                if name not in parameters:
+                    raise CommandError(f'The {target} benchmark does not take --{name}')
+                kwargs[name] = options[name]
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+            if baseline.get('target') != target:
+                raise CommandError(f"{options['compare']} holds {baseline.get('target')} results, not {target}")
+
+        self.stdout.write(f"Running {target} benchmark...")
+        try:
+            with isolated_database():
+                results = bench(**kwargs)
+        except Exception as e:
+            raise CommandError(f'Benchmark failed: {e}')
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'target': target,
+                    'options': kwargs,
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'results': results,
+                }, f, indent=2)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        previous = {self.row_key(row): row for row in baseline['results']} if baseline else {}
+        for row in results:
+            before = previous.get(self.row_key(row), {})
+            self.stdout.write('  '.join(
+                f'{key}={value}{self.change(before.get(key), value)}' for key, value in row.items()
+            ))
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    @staticmethod
+    def row_key(row):
+        """The fields naming what a row measured, so rows of two runs can be matched up"""
+        return tuple((key, row[key]) for key in IDENTITY_FIELDS if key in row)
+
+    @staticmethod
+    def change(before, after):
+        if isinstance(before, bool) or not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+            return ''
+        if before == after:
+            return ''
+        if before == 0:
+            return f' (was {before})'
+        return f' ({(after - before) / before:+.0%})'
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from dex_token.crawler import RecordedResponses, ResponseRecorder
+from dex_token.models import IngestRun
+from dex_token.refresh import REFRESHED, RefreshTimeout
+from dex_token.scheduler import run_ingest
+
+class Command(BaseCommand):
+    help = 'Crawl chains in parallel shards and upsert every pair found'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chain', action='append', help='Chain to crawl; repeat for several (default: all CRAWL_SEEDS)')
+        parser.add_argument('--depth', type=int, help='Search levels per shard (default: CRAWL_DEPTH)')
+        parser.add_argument('--recorded', metavar='FILE', help='Replay responses saved with --record instead of calling the API')
+        parser.add_argument('--record', metavar='FILE', help='Save every upstream response to FILE')
+
+    def handle(self, *args, **options):
+        chains = [chain.upper() for chain in options['chain'] or settings.CRAWL_SEEDS]
+        fetch = None
+        if options['recorded']:
+            try:
+                fetch = RecordedResponses.load(options['recorded'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read recorded responses: {e}')
+        if options['record']:
+            fetch = ResponseRecorder(fetch)
+
+        self.stdout.write(f"Crawling {', '.join(chains)}...")
+        for chain in chains:
+            # The same lock as scheduled and API runs: a chain is never
+            # ingested twice at once
+            try:
+                stats, status = run_ingest(chain, trigger=IngestRun.COMMAND, wait=True,
+                                           fetch=fetch, depth=options['depth'])
+            except RefreshTimeout:
+                self.stdout.write(self.style.WARNING(f'{chain}: another run is still in progress'))
+                continue
+            except Exception as e:
+                raise CommandError(f'Crawl of {chain} failed: {e}')
+
+            if status != REFRESHED:
+                self.stdout.write(f'{chain}: reused the run of another process ({status})')
+            if stats is None:
+                self.stdout.write(self.style.WARNING(f'{chain}: every upstream query failed'))
+                continue
+            for shard in stats['shards']:
+                self.stdout.write(
+                    f"  {shard['shard']}: {shard['queries']} queries ({shard['failed']} failed), "
+                    f"{shard['written']} pairs in {shard['fetch_seconds']}s + {shard['write_seconds']}s"
+                    + (f" error: {shard['error']}" if shard['error'] else '')
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f"{chain}: inserted {stats['inserted']}, updated {stats['updated']}, unchanged {stats['unchanged']} tokens"
+            ))
+
+        if options['record']:
+            fetch.save(options['record'])
+            self.stdout.write(f"Recorded {len(fetch.responses)} responses to {options['record']}")
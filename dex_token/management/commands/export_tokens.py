@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from dex_token.export import CHUNK_SIZE, FILTER_FIELDS, FORMATS, export_fields, export_queryset, stream_export
+
+class Command(BaseCommand):
+    help = 'Export the Token table, or a filtered subset, as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+        parser.add_argument('--output', '-o', help='File to write; standard output by default')
+        parser.add_argument('--fields', help='Comma separated fields to export; all by default')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows fetched per round trip')
+        for field in FILTER_FIELDS:
+            parser.add_argument(f'--{field}', help=f'Only export tokens with this {field}')
+
+    def handle(self, *args, **options):
+        try:
+            names = export_fields(options['fields'])
+        except ValidationError as e:
+            raise CommandError(e.detail['fields'])
+
+        queryset = export_queryset({field: options[field] for field in FILTER_FIELDS})
+        chunks = stream_export(queryset, options['format'], names, options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Exported tokens to {options['output']}"))
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from dex_token.repair import CHUNK_SIZE, repair_tokens
+from dex_token.services import publish_changes
+
+class Command(BaseCommand):
+    help = 'Repair corrupt or out-of-range Token values in chunked, set-based updates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows per transaction')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        report = repair_tokens(dry_run=dry_run, chunk_size=options['chunk_size'])
+
+        verb = 'Would fix' if dry_run else 'Fixed'
+        for name, count in report.items():
+            if name not in ('rejected', 'rows', 'chunks', 'seconds') and count:
+                self.stdout.write(f"{verb} {name}: {count} rows")
+        verb = 'Would quarantine' if dry_run else 'Quarantined'
+        self.stdout.write(f"{verb} {report['rejected']} tokens without a valid price")
+
+        if dry_run:
+            self.stdout.write(f"Would repair {report['rows']} rows; scanned {report['chunks']} chunks in {report['seconds']}s")
+            return
+        if report['rows'] or report['rejected']:
+            publish_changes()
+        self.stdout.write(self.style.SUCCESS(
+            f"Repaired {report['rows']} rows in {report['chunks']} chunks, {report['seconds']}s"
+        ))
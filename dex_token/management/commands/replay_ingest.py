@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from dex_token.benchmarks import isolated_database
+from dex_token.replay import replay_ingest
+from dex_token.standin import PAGE_SIZE
+
+class Command(BaseCommand):
+    help = 'Replay ingestion against a local Dexscreener stand-in and report throughput, stage timings and writes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=2_000, help='Pairs served by the stand-in')
+        parser.add_argument('--latency', type=float, default=0.01, help='Seconds added to every response')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a 500')
+        parser.add_argument('--rate-limit', type=int, help='Requests per second before the stand-in answers 429')
+        parser.add_argument('--lookups', type=int, default=200, help='fetch_and_analyze_token calls')
+        parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Pairs per /search response')
+        parser.add_argument('--client-limits', action='store_true', help='Keep the client-side rate limiter')
+        parser.add_argument('--json', action='store_true', help='Print raw JSON results')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Replaying ingestion of {options['size']} pairs...")
+        try:
+            with isolated_database():
+                results = replay_ingest(
+                    size=options['size'],
+                    latency=options['latency'],
+                    error_rate=options['error_rate'],
+                    rate_limit=options['rate_limit'],
+                    lookups=options['lookups'],
+                    page_size=options['page_size'],
+                    client_limits=options['client_limits'],
+                )
+        except Exception as e:
+            raise CommandError(f'Replay failed: {e}')
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for row in results:
+            self.stdout.write('  '.join(f'{key}={value}' for key, value in row.items()))
+        self.stdout.write(self.style.SUCCESS('Replay complete'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+from dex_token.history import ROLLUP_SOURCE, rollup, update_price_change_7d
+
+class Command(BaseCommand):
+    help = 'Build 5m/1h/1d OHLC candles from recorded price snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Rebuild buckets from this ISO timestamp instead of the last built one')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid timestamp: {options['since']}")
+
+        for interval in ROLLUP_SOURCE:
+            count = rollup(interval, since)
+            self.stdout.write(f'{interval}: {count} candles written')
+        count = update_price_change_7d()
+        self.stdout.write(self.style.SUCCESS(f'Updated 7d price change for {count} tokens'))
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from dex_token.history import rollup_all
+from dex_token.scheduler import run_due
+
+class Command(BaseCommand):
+    help = 'Run the ingestion schedule in-process, without a Celery broker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run due chains once and exit')
+        parser.add_argument('--tick', type=float, default=5.0, help='Seconds between schedule checks')
+
+    def handle(self, *args, **options):
+        schedule = ', '.join(f'{chain} every {seconds}s' for chain, seconds in settings.INGEST_SCHEDULE.items())
+        self.stdout.write(f'Ingestion schedule: {schedule}')
+
+        while True:
+            try:
+                results = run_due()
+                for chain, status in results.items():
+                    self.stdout.write(f'{chain}: {status}')
+                if results:
+                    rollup_all()
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Error running ingestion: {e}'))
+            if options['once']:
+                break
+            time.sleep(options['tick'])
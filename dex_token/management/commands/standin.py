@@ -0,0 +1,44 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from dex_token.benchmarks import synthetic_pairs
+from dex_token.standin import PAGE_SIZE, StandinServer
+
+class Command(BaseCommand):
+    help = 'Serve recorded or synthetic pairs as a local Dexscreener stand-in (set DEXSCREENER_API_URL to its URL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--recorded', metavar='FILE', help='A recorded /search response to serve instead of synthetic pairs')
+        parser.add_argument('--size', type=int, default=1_000, help='Synthetic pairs to serve')
+        parser.add_argument('--chain', default='bsc', help='chainId of the synthetic pairs')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a 500')
+        parser.add_argument('--rate-limit', type=int, help='Requests per second before answering 429')
+        parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Pairs per /search response')
+
+    def handle(self, *args, **options):
+        if options['recorded']:
+            try:
+                with open(options['recorded']) as f:
+                    pairs = json.load(f)['pairs']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f'Cannot read recorded response: {e}')
+        else:
+            pairs = synthetic_pairs(options['size'], chain=options['chain'])
+
+        standin = StandinServer(
+            pairs, latency=options['latency'], error_rate=options['error_rate'], rate_limit=options['rate_limit'],
+            page_size=options['page_size'], host=options['host'], port=options['port'],
+        )
+        with standin:
+            self.stdout.write(self.style.SUCCESS(f'Serving {len(pairs)} pairs at {standin.base_url}'))
+            self.stdout.write('Quit with CONTROL-C.')
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+        self.stdout.write(', '.join(f'{name} {count}' for name, count in sorted(standin.counts.items())))
@@ -1,14 +1,42 @@
 from django.core.management.base import BaseCommand
+from dex_token.models import IngestRun
+from dex_token.scheduler import run_ingest
 from dex_token.services import update_tokens_from_api
 
 class Command(BaseCommand):
     help = 'Update token data from Dexscreener API'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batched',
+            action='store_true',
+            help='Write the whole cycle with one bulk upsert transaction',
+        )
+        parser.add_argument('--chain', default='BSC', help='Chain to ingest')
+
     def handle(self, *args, **options):
         self.stdout.write('Starting token data update...')
         
         try:
-            count = update_tokens_from_api()
+            if options['batched']:
+                stats, status = run_ingest(options['chain'], trigger=IngestRun.COMMAND, wait=True)
+                if stats is None:
+                    self.stdout.write(self.style.WARNING('No tokens were updated'))
+                    return
+                for shard in stats.get('shards', []):
+                    self.stdout.write(
+                        f"  {shard['shard']}: {shard['queries']} queries, {shard['written']} pairs "
+                        f"in {shard['fetch_seconds']}s + {shard['write_seconds']}s"
+                    )
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Inserted {stats['inserted']}, updated {stats['updated']}, "
+                        f"unchanged {stats['unchanged']} tokens"
+                    )
+                )
+                return
+
+            count = update_tokens_from_api(chain=options['chain'])
             if count:
                 self.stdout.write(
                     self.style.SUCCESS(f'Successfully updated {count} tokens')
@@ -0,0 +1,172 @@
+"""Prometheus metrics for requests, database time, Dexscreener calls and ingest.
+
+- MetricsMiddleware times every request and labels it with the URL name of
+  the route it resolved to. Streaming responses are timed until their
+  headers. It also counts the request's SQL queries and their time.
+- Queries are attributed through a context variable, so queries that an
+  async view runs in sync_to_async threads count too. Queries outside a
+  request, e.g. in ingest runs, are not attributed to any request.
+- dex_token.upstream records every Dexscreener attempt and every call it
+  refuses locally; services.py and the crawler count the lookups that gave
+  up with upstream_failed().
+- services.py and the crawler time the ingest stages with stage().
+
+render() serves the text format for /metrics. Run every worker process
+with PROMETHEUS_MULTIPROC_DIR pointing at one shared, emptied-at-start
+directory. Every process then writes its samples there and /metrics
+aggregates them, whichever worker answers. Without that variable each
+process reports only its own metrics.
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+UNMATCHED = '<unmatched>'  # Route label of requests no URL pattern resolved
+
+REQUEST_SECONDS = Histogram(
+    'dex_http_request_duration_seconds', 'Request latency until the response headers, by route',
+    ['route', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+REQUEST_QUERIES = Histogram(
+    'dex_http_request_queries', 'SQL queries run by one request, by route',
+    ['route'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+REQUEST_DB_SECONDS = Histogram(
+    'dex_http_request_db_seconds', 'Time one request spent in SQL queries, by route',
+    ['route'], buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+UPSTREAM_SECONDS = Histogram(
+    'dex_upstream_request_duration_seconds', 'Dexscreener request attempts by endpoint and outcome',
+    ['endpoint', 'status'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+UPSTREAM_REFUSED = Counter(
+    'dex_upstream_refused_total', 'Dexscreener calls refused without a request, by endpoint and reason',
+    ['endpoint', 'reason'],
+)
+UPSTREAM_FAILED = Counter(
+    'dex_upstream_failed_total', 'Dexscreener lookups that gave up after retries, by operation and error',
+    ['operation', 'error'],
+)
+INGEST_STAGE_SECONDS = Histogram(
+    'dex_ingest_stage_duration_seconds', 'Duration of ingest stages',
+    ['stage'], buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_current = ContextVar('dex_request_stats', default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - start
+
+
+@receiver(connection_created)
+def _instrument_connection(connection, **kwargs):
+    # First in the list: execute_wrapper() blocks pop the last wrapper on exit
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return (match.url_name or match.view_name) if match else UNMATCHED
+
+
+def _observe(request, response, stats, start):
+    route = route_name(request)
+    REQUEST_SECONDS.labels(route, request.method, response.status_code).observe(time.perf_counter() - start)
+    REQUEST_QUERIES.labels(route).observe(stats.queries)
+    REQUEST_DB_SECONDS.labels(route).observe(stats.db_seconds)
+
+
+class MetricsMiddleware:
+    """Records latency, query count and database time of every request"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, start = RequestStats(), time.perf_counter()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        _observe(request, response, stats, start)
+        return response
+
+    async def __acall__(self, request):
+        stats, start = RequestStats(), time.perf_counter()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        _observe(request, response, stats, start)
+        return response
+
+
+def observe_upstream(endpoint, status, seconds):
+    """One Dexscreener attempt: status is the HTTP status or the exception class name"""
+    UPSTREAM_SECONDS.labels(endpoint, str(status)).observe(seconds)
+
+
+def upstream_refused(endpoint, reason):
+    UPSTREAM_REFUSED.labels(endpoint, reason).inc()
+
+
+def upstream_failed(operation, error):
+    """A lookup that gave up; error is the exception"""
+    UPSTREAM_FAILED.labels(operation, error.__class__.__name__).inc()
+
+
+@contextmanager
+def stage(name):
+    """Time an ingest stage; also usable as a function decorator"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        INGEST_STAGE_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+
+def render():
+    """(body, content type) of the metrics of every worker process"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dex_token', '0003_ingestrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Candle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interval', models.CharField(choices=[('5m', '5 minutes'), ('1h', '1 hour'), ('1d', '1 day')], max_length=3)),
+                ('bucket_start', models.DateTimeField()),
+                ('open', models.DecimalField(decimal_places=10, max_digits=20)),
+                ('high', models.DecimalField(decimal_places=10, max_digits=20)),
+                ('low', models.DecimalField(decimal_places=10, max_digits=20)),
+                ('close', models.DecimalField(decimal_places=10, max_digits=20)),
+                ('volume_24h', models.BigIntegerField(help_text='Rolling 24h volume at the close')),
+                ('samples', models.IntegerField(default=0)),
+                ('token', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='candles', to='dex_token.token')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['interval', 'bucket_start'], name='candle_interval_bucket')],
+                'constraints': [models.UniqueConstraint(fields=('token', 'interval', 'bucket_start'), name='candle_token_interval_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PricePoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('price_usd', models.DecimalField(decimal_places=10, max_digits=20)),
+                ('volume_24h', models.BigIntegerField()),
+                ('liquidity', models.BigIntegerField()),
+                ('token', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='price_points', to='dex_token.token')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'timestamp'], name='pricepoint_token_ts'), models.Index(fields=['timestamp'], name='pricepoint_ts')],
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:12
+
+from django.db import migrations, models
+
+# Columns looked up with __iexact by token_checker and the address search
+CASE_INSENSITIVE_COLUMNS = ['symbol', 'token_address', 'pair_address']
+
+
+def create_case_insensitive_indexes(apps, schema_editor):
+    # iexact compiles to LIKE on SQLite (served by a NOCASE index) and to
+    # UPPER(col::text) = UPPER(%s) on PostgreSQL (served by an expression index)
+    vendor = schema_editor.connection.vendor
+    for column in CASE_INSENSITIVE_COLUMNS:
+        if vendor == 'sqlite':
+            expression = f'"{column}" COLLATE NOCASE'
+        elif vendor == 'postgresql':
+            expression = f'UPPER(("{column}")::text)'
+        else:
+            continue
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS "token_{column}_ci" ON "dex_token_token" ({expression})')
+
+
+def drop_case_insensitive_indexes(apps, schema_editor):
+    for column in CASE_INSENSITIVE_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "token_{column}_ci"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dex_token', '0004_price_history'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(fields=['-analysis_score', '-volume_24h'], name='token_score_volume'),
+        ),
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(fields=['recommendation', '-analysis_score', '-volume_24h'], name='token_rec_score_volume'),
+        ),
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(fields=['recommendation', 'volume_24h'], name='token_rec_volume'),
+        ),
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(fields=['recommendation', 'market_cap'], name='token_rec_market_cap'),
+        ),
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(fields=['recommendation', 'price_change_24h'], name='token_rec_change_24h'),
+        ),
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(fields=['symbol', '-analysis_score'], name='token_symbol_score'),
+        ),
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(fields=['volume_24h'], name='token_volume'),
+        ),
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(fields=['market_cap'], name='token_market_cap'),
+        ),
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(fields=['price_change_24h'], name='token_change_24h'),
+        ),
+        migrations.RunPython(create_case_insensitive_indexes, drop_case_insensitive_indexes),
+    ]
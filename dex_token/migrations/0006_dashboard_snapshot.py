@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:14
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dex_token', '0005_token_read_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation', models.PositiveBigIntegerField(default=0)),
+                ('total_tokens', models.IntegerField(default=0)),
+                ('counts', models.JSONField(default=dict, help_text='Token count per recommendation')),
+                ('leaderboards', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Top tokens per recommendation, in default ordering')),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
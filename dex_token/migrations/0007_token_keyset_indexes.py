@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dex_token', '0006_dashboard_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(fields=['analysis_score', 'id'], name='token_score_id'),
+        ),
+        migrations.AddIndex(
+            model_name='token',
+            index=models.Index(fields=['recommendation', 'analysis_score', 'id'], name='token_rec_score_id'),
+        ),
+    ]
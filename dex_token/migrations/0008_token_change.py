@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 01:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dex_token', '0007_token_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recommendation', models.CharField(choices=[('BUY', 'Buy'), ('HOLD', 'Hold'), ('AVOID', 'Avoid')], max_length=5)),
+                ('previous_recommendation', models.CharField(blank=True, help_text='Empty when the token was inserted', max_length=5)),
+                ('changes', models.JSONField(help_text='Changed fields in their API representation')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('token', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='dex_token.token')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='token_change_created')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dex_token', '0008_token_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuarantinedPair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pair_address', models.CharField(blank=True, max_length=100)),
+                ('chain_id', models.CharField(blank=True, max_length=50)),
+                ('reason', models.CharField(max_length=200)),
+                ('payload', models.JSONField()),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(fields=['received_at'], name='quarantine_received')],
+            },
+        ),
+    ]
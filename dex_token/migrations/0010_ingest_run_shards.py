@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dex_token', '0009_quarantined_pair'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestrun',
+            name='shards',
+            field=models.JSONField(blank=True, default=list, help_text='Per-shard crawl report'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dex_token', '0010_ingest_run_shards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='token',
+            name='fingerprint',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
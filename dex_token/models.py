@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 
@@ -50,9 +51,182 @@ class Token(models.Model):
     
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    # Hash of the ingested values (services.fingerprint); NULL forces a full comparison
+    fingerprint = models.BigIntegerField(null=True, blank=True, editable=False)
     
     class Meta:
         ordering = ['-analysis_score', '-volume_24h']
+        # One index per hot read path so none of them scans the table or sorts
+        # in a temp B-tree: the default ordering, the recommendation buckets in
+        # that ordering, and every API ordering_fields entry alone and within a
+        # bucket. Case-insensitive lookup indexes are vendor specific and live
+        # in migration 0005.
+        indexes = [
+            models.Index(fields=['-analysis_score', '-volume_24h'], name='token_score_volume'),
+            models.Index(fields=['recommendation', '-analysis_score', '-volume_24h'], name='token_rec_score_volume'),
+            models.Index(fields=['recommendation', 'volume_24h'], name='token_rec_volume'),
+            models.Index(fields=['recommendation', 'market_cap'], name='token_rec_market_cap'),
+            models.Index(fields=['recommendation', 'price_change_24h'], name='token_rec_change_24h'),
+            models.Index(fields=['symbol', '-analysis_score'], name='token_symbol_score'),
+            models.Index(fields=['volume_24h'], name='token_volume'),
+            models.Index(fields=['market_cap'], name='token_market_cap'),
+            models.Index(fields=['price_change_24h'], name='token_change_24h'),
+            # Keyset pages order by (field, id); analysis_score has heavy ties
+            models.Index(fields=['analysis_score', 'id'], name='token_score_id'),
+            models.Index(fields=['recommendation', 'analysis_score', 'id'], name='token_rec_score_id'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.symbol})"
+
+
+class IngestRun(models.Model):
+    """History of ingest cycles, one row per run that did (or skipped) work"""
+    SCHEDULE = 'schedule'
+    API = 'api'
+    COMMAND = 'command'
+    TRIGGER_CHOICES = [
+        (SCHEDULE, 'Schedule'),
+        (API, 'API'),
+        (COMMAND, 'Command'),
+    ]
+
+    RUNNING = 'running'
+    SUCCESS = 'success'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+    STATUS_CHOICES = [
+        (RUNNING, 'Running'),
+        (SUCCESS, 'Success'),
+        (FAILED, 'Failed'),
+        (SKIPPED, 'Skipped'),
+    ]
+
+    chain = models.CharField(max_length=50)
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES, default=SCHEDULE)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RUNNING)
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True, help_text='Seconds')
+    rows = models.IntegerField(default=0)
+    inserted = models.IntegerField(default=0)
+    updated = models.IntegerField(default=0)
+    unchanged = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    shards = models.JSONField(default=list, blank=True, help_text='Per-shard crawl report')
+
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [models.Index(fields=['chain', '-started_at'])]
+
+    def __str__(self):
+        return f"{self.chain} {self.status} at {self.started_at:%Y-%m-%d %H:%M:%S}"
+
+    def finish(self, status, error='', **stats):
+        self.status = status
+        self.error = error
+        self.finished_at = timezone.now()
+        self.duration = (self.finished_at - self.started_at).total_seconds()
+        for key in ('inserted', 'updated', 'unchanged'):
+            setattr(self, key, stats.get(key, 0))
+        self.shards = stats.get('shards', [])
+        self.rows = self.inserted + self.updated + self.unchanged
+        self.save()
+
+
+class PricePoint(models.Model):
+    """Append-only price snapshot written for every pair on each ingest"""
+    token = models.ForeignKey(Token, on_delete=models.CASCADE, related_name='price_points', db_index=False)
+    timestamp = models.DateTimeField()
+    price_usd = models.DecimalField(max_digits=20, decimal_places=10)
+    volume_24h = models.BigIntegerField()
+    liquidity = models.BigIntegerField()
+
+    class Meta:
+        # (token, timestamp) serves per-token range reads, so the FK needs no
+        # index of its own; timestamp alone serves the incremental rollups
+        indexes = [
+            models.Index(fields=['token', 'timestamp'], name='pricepoint_token_ts'),
+            models.Index(fields=['timestamp'], name='pricepoint_ts'),
+        ]
+
+    def __str__(self):
+        return f"{self.token_id} {self.price_usd} at {self.timestamp}"
+
+
+class Candle(models.Model):
+    """OHLC rollup of PricePoint rows for one token and bucket"""
+    FIVE_MINUTES = '5m'
+    HOUR = '1h'
+    DAY = '1d'
+    INTERVAL_CHOICES = [
+        (FIVE_MINUTES, '5 minutes'),
+        (HOUR, '1 hour'),
+        (DAY, '1 day'),
+    ]
+
+    token = models.ForeignKey(Token, on_delete=models.CASCADE, related_name='candles', db_index=False)
+    interval = models.CharField(max_length=3, choices=INTERVAL_CHOICES)
+    bucket_start = models.DateTimeField()
+    open = models.DecimalField(max_digits=20, decimal_places=10)
+    high = models.DecimalField(max_digits=20, decimal_places=10)
+    low = models.DecimalField(max_digits=20, decimal_places=10)
+    close = models.DecimalField(max_digits=20, decimal_places=10)
+    volume_24h = models.BigIntegerField(help_text='Rolling 24h volume at the close')
+    samples = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['token', 'interval', 'bucket_start'], name='candle_token_interval_bucket'),
+        ]
+        indexes = [models.Index(fields=['interval', 'bucket_start'], name='candle_interval_bucket')]
+
+    def __str__(self):
+        return f"{self.token_id} {self.interval} {self.bucket_start}"
+
+
+class DashboardSnapshot(models.Model):
+    """Single-row summary of the Token table, rebuilt atomically on ingest"""
+    SINGLETON_ID = 1
+
+    generation = models.PositiveBigIntegerField(default=0)
+    total_tokens = models.IntegerField(default=0)
+    counts = models.JSONField(default=dict, help_text='Token count per recommendation')
+    leaderboards = models.JSONField(default=dict, encoder=DjangoJSONEncoder,
+                                    help_text='Top tokens per recommendation, in default ordering')
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Dashboard snapshot #{self.generation}"
+
+
+class TokenChange(models.Model):
+    """Changed price and recommendation fields of one token, pushed to live streams"""
+    token = models.ForeignKey(Token, on_delete=models.CASCADE, related_name='changes', db_index=False)
+    recommendation = models.CharField(max_length=5, choices=Token.RECOMMENDATION_CHOICES)
+    previous_recommendation = models.CharField(max_length=5, blank=True,
+                                               help_text='Empty when the token was inserted')
+    changes = models.JSONField(help_text='Changed fields in their API representation')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['created_at'], name='token_change_created')]
+
+    def __str__(self):
+        return f"{self.token_id} {', '.join(self.changes)}"
+
+
+class QuarantinedPair(models.Model):
+    """Upstream pair rejected at ingest, kept with its raw payload for inspection"""
+    pair_address = models.CharField(max_length=100, blank=True)
+    chain_id = models.CharField(max_length=50, blank=True)
+    reason = models.CharField(max_length=200)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-received_at']
+        indexes = [models.Index(fields=['received_at'], name='quarantine_received')]
+
+    def __str__(self):
+        return f"{self.pair_address or '?'}: {self.reason}"
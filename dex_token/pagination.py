@@ -0,0 +1,158 @@
+"""Keyset (cursor) pagination for the token list APIs.
+
+Page-number pagination runs a COUNT(*) and an OFFSET scan on every page,
+so deep pages get slower the further a client goes. In keyset mode the
+page after a cursor is found with an index seek on (ordering field, id),
+so page 10,000 costs the same as page 1. Cursors are opaque and there is
+no total count.
+
+Keyset mode is opt-in per request with ?pagination=cursor (or any ?cursor=);
+everything else keeps the page-number responses.
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import BooleanField, F, Func, Value
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+KEYSET_FIELDS = ('analysis_score', 'volume_24h', 'market_cap', 'price_change_24h')
+
+
+def encode_cursor(ordering, value, pk, reverse=False):
+    """Opaque cursor for the row (value, pk) under ordering, e.g. '-analysis_score'"""
+    position = {'o': ordering, 'v': str(value), 'id': pk, 'r': int(reverse)}
+    data = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+class Row(Func):
+    """SQL row value, e.g. (analysis_score, id)"""
+    template = '(%(expressions)s)'
+
+
+class RowCompare(Func):
+    """(a, b) < (x, y); a single index seek on SQLite, PostgreSQL and MySQL"""
+    template = '%(expressions)s'
+    output_field = BooleanField()
+
+    def __init__(self, lhs, operator, rhs):
+        self.arg_joiner = f' {operator} '
+        super().__init__(lhs, rhs)
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, page_size=None):
+        self.page_size = page_size or api_settings.PAGE_SIZE
+
+    @classmethod
+    def requested(cls, request):
+        params = request.query_params
+        return cls.cursor_query_param in params or params.get(cls.mode_query_param) == 'cursor'
+
+    def get_ordering(self, queryset):
+        """(field, descending) for the queryset's single-field ordering"""
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)[:1]
+        if len(ordering) != 1 or ordering[0].lstrip('-') not in KEYSET_FIELDS:
+            raise ValidationError(
+                f"Cursor pagination needs a single ordering from {', '.join(KEYSET_FIELDS)}"
+            )
+        return ordering[0].lstrip('-'), ordering[0].startswith('-')
+
+    def cursor_for(self, token, reverse=False):
+        # Pages hold model instances or values() rows
+        if isinstance(token, dict):
+            return encode_cursor(self.ordering, token[self.field], token['id'], reverse)
+        return encode_cursor(self.ordering, getattr(token, self.field), token.id, reverse)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            position = json.loads(data)
+            if position['o'] != self.ordering:
+                raise ValueError('cursor ordering does not match the request')
+            field = self.queryset_model._meta.get_field(self.field)
+            return field.to_python(position['v']), int(position['id']), bool(position['r'])
+        except (binascii.Error, ValueError, TypeError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.queryset_model = queryset.model
+        self.field, descending = self.get_ordering(queryset)
+        self.ordering = f"{'-' if descending else ''}{self.field}"
+        position = self.decode_cursor(request)
+        reverse = bool(position and position[2])
+
+        # Walking backwards flips both the sort and the comparison
+        backwards = descending != reverse
+        sign = '-' if backwards else ''
+        queryset = queryset.order_by(f'{sign}{self.field}', f'{sign}id')
+        if position is not None:
+            field = queryset.model._meta.get_field(self.field)
+            queryset = queryset.filter(RowCompare(
+                Row(F(self.field), F('id')),
+                '<' if backwards else '>',
+                Row(Value(position[0], output_field=field), Value(position[1])),
+            ))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.cursor_for(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.page:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.cursor_for(self.page[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class TokenPagination(PageNumberPagination):
+    """Page numbers by default, keyset pages when the request asks for them"""
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if KeysetPagination.requested(request):
+            self.keyset = KeysetPagination(self.page_size)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
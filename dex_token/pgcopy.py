@@ -0,0 +1,108 @@
+"""COPY-based bulk ingestion for PostgreSQL.
+
+merge_tokens() streams a whole ingest cycle into a temporary staging table
+with COPY. One INSERT ... ON CONFLICT (pair_address) DO UPDATE then merges
+it into the Token table, rewriting only rows whose fingerprint changed. The
+same statement returns every pair's token id, whether the pair was inserted
+or written, and the live fields as they were before the merge, which the
+caller needs for price history and live changes. copy_price_points() writes
+the price snapshots with COPY as well.
+
+Only used when connection.vendor == 'postgresql'; see bulk_upsert_tokens.
+"""
+from django.db import connection
+
+from .live import LIVE_FIELDS
+from .models import PricePoint, Token
+
+STAGE_TABLE = 'dex_token_stage'
+_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def copy_text(value):
+    """A value in COPY text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).translate(_ESCAPES)
+
+
+def copy_rows(cursor, table, columns, rows):
+    """COPY rows (sequences of database-ready values) into table"""
+    names = ', '.join(connection.ops.quote_name(column) for column in columns)
+    with cursor.copy(f'COPY {connection.ops.quote_name(table)} ({names}) FROM STDIN') as copy:
+        for row in rows:
+            copy.write('\t'.join(copy_text(value) for value in row) + '\n')
+
+
+def merge_tokens(incoming, upsert_fields, observed_at):
+    """Stage and merge {pair_address: (defaults, fingerprint)} in the current transaction.
+
+    Returns (pair_address, token_id, inserted, written, previous) tuples;
+    previous maps 'recommendation' and the live fields to their stored
+    values, or is None for inserted pairs.
+    """
+    fields = {field.name: field for field in Token._meta.concrete_fields}
+    assigned = [name for name in upsert_fields if name != 'updated_at']
+    columns = ['pair_address', *assigned, 'fingerprint', 'created_at', 'updated_at']
+    db_columns = [fields[name].column for name in columns]
+    previous = list(dict.fromkeys(['recommendation', *LIVE_FIELDS]))
+    table = connection.ops.quote_name(Token._meta.db_table)
+    quote = connection.ops.quote_name
+
+    def prepared(pair_address, defaults, digest):
+        values = {**defaults, 'pair_address': pair_address, 'fingerprint': digest,
+                  'created_at': observed_at, 'updated_at': observed_at}
+        return [fields[name].get_db_prep_save(values[name], connection) for name in columns]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {quote(STAGE_TABLE)} ON COMMIT DROP AS '
+            f'SELECT {", ".join(quote(column) for column in db_columns)} FROM {table} WITH NO DATA'
+        )
+        copy_rows(cursor, STAGE_TABLE, db_columns, (
+            prepared(pair_address, defaults, digest) for pair_address, (defaults, digest) in incoming.items()
+        ))
+        column_list = ', '.join(quote(column) for column in db_columns)
+        updates = ', '.join(
+            f'{quote(fields[name].column)} = EXCLUDED.{quote(fields[name].column)}'
+            for name in [*assigned, 'fingerprint', 'updated_at']
+        )
+        old_columns = ', '.join(f't.{quote(fields[name].column)}' for name in previous)
+        # Every part of the statement sees the table as it was before it, so
+        # "old" holds the pre-merge rows
+        cursor.execute(f"""
+            WITH old AS (
+                SELECT t.id, t.pair_address, {old_columns}
+                FROM {table} t JOIN {quote(STAGE_TABLE)} s ON s.pair_address = t.pair_address
+            ), merged AS (
+                INSERT INTO {table} ({column_list})
+                SELECT {column_list} FROM {quote(STAGE_TABLE)}
+                ON CONFLICT (pair_address) DO UPDATE SET {updates}
+                WHERE {table}.fingerprint IS DISTINCT FROM EXCLUDED.fingerprint
+                RETURNING id, pair_address
+            )
+            SELECT COALESCE(m.pair_address, o.pair_address), COALESCE(m.id, o.id),
+                   o.id IS NULL, m.id IS NOT NULL, {', '.join(f'o.{quote(fields[name].column)}' for name in previous)}
+            FROM merged m FULL OUTER JOIN old o ON o.pair_address = m.pair_address
+        """)
+        rows = cursor.fetchall()
+        # ON COMMIT DROP alone would clash with a second merge in the same transaction
+        cursor.execute(f'DROP TABLE {quote(STAGE_TABLE)}')
+    return [
+        (pair_address, token_id, inserted, written, None if inserted else dict(zip(previous, values)))
+        for pair_address, token_id, inserted, written, *values in rows
+    ]
+
+
+def copy_price_points(rows, observed_at):
+    """COPY (token_id, price_usd, volume_24h, liquidity) snapshots into the price history"""
+    fields = {field.name: field for field in PricePoint._meta.concrete_fields}
+    names = ['token', 'timestamp', 'price_usd', 'volume_24h', 'liquidity']
+    with connection.cursor() as cursor:
+        copy_rows(cursor, PricePoint._meta.db_table, [fields[name].column for name in names], (
+            [fields[name].get_db_prep_save(value, connection)
+             for name, value in zip(names, (token_id, observed_at, price, volume, liquidity))]
+            for token_id, price, volume, liquidity in rows
+        ))
@@ -0,0 +1,106 @@
+"""Single-flight coordination for upstream refreshes.
+
+Only one refresh of a given name runs at a time across every worker
+process. Callers that arrive while it is running wait on the same file
+lock and take its result instead of starting their own, and a refresh that
+completed within the freshness window is returned without touching
+upstream at all.
+"""
+import fcntl
+import json
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+FRESH = 'fresh'
+JOINED = 'joined'
+REFRESHED = 'refreshed'
+
+
+class RefreshTimeout(Exception):
+    """Raised when the refresh lock could not be acquired in time"""
+
+
+class RefreshFailed(Exception):
+    """Raised for callers that joined a refresh which raised an error"""
+
+
+class RefreshCoordinator:
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, name, freshness=None, timeout=None, state_dir=None):
+        self.name = name
+        self.freshness = settings.REFRESH_FRESHNESS_SECONDS if freshness is None else freshness
+        self.timeout = settings.REFRESH_LOCK_TIMEOUT if timeout is None else timeout
+        state_dir = Path(state_dir or settings.STATE_DIR)
+        state_dir.mkdir(parents=True, exist_ok=True)
+        self.lock_path = state_dir / f'{name}.lock'
+        self.state_path = state_dir / f'{name}.json'
+
+    def read_state(self):
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'generation': 0}
+
+    def _write_state(self, state):
+        tmp_path = self.state_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _is_fresh(self, state, now):
+        completed_at = state.get('completed_at')
+        return bool(self.freshness and completed_at and now - completed_at < self.freshness)
+
+    def _acquire(self, lock_file):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise RefreshTimeout(f"Timed out waiting for the '{self.name}' refresh")
+                time.sleep(self.POLL_INTERVAL)
+
+    @staticmethod
+    def _outcome(state, status):
+        if state.get('error'):
+            raise RefreshFailed(state['error'])
+        return state.get('result'), status
+
+    def run(self, refresh):
+        """Run refresh() unless a recent or in-flight one can be reused.
+
+        Returns (result, status) where status is FRESH, JOINED or REFRESHED.
+        """
+        state = self.read_state()
+        if self._is_fresh(state, time.time()):
+            return self._outcome(state, FRESH)
+        seen_generation = state.get('generation', 0)
+
+        with open(self.lock_path, 'a+') as lock_file:
+            self._acquire(lock_file)
+            try:
+                # Someone finished a refresh while we were waiting for the lock
+                state = self.read_state()
+                if state.get('generation', 0) != seen_generation:
+                    return self._outcome(state, JOINED)
+
+                started_at = time.time()
+                new_state = {'generation': seen_generation + 1, 'started_at': started_at}
+                try:
+                    result = refresh()
+                except Exception as e:
+                    new_state['error'] = str(e) or e.__class__.__name__
+                    self._write_state(new_state)
+                    raise
+                new_state.update(result=result, completed_at=time.time())
+                self._write_state(new_state)
+                return result, REFRESHED
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
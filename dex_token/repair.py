@@ -0,0 +1,179 @@
+"""Set-based repair of Token rows stored before ingest validation.
+
+The table is walked in primary-key ranges of chunk_size rows. Each range
+is fixed with one UPDATE whose CASE expressions apply the same limits as
+ingest validation: values that are not numbers (text, NaN, infinities)
+become 0 or NULL, numbers outside their column range are clamped, and an
+unknown recommendation becomes HOLD. Repaired rows lose their ingest
+fingerprint so the next ingest compares them column by column. Rows whose
+price ingest would reject (validation.PRICE_RANGE: not a number, not above
+0 or too large) cannot be repaired; they are moved to the quarantine table
+and deleted. Every range is written through the writer queue and commits on
+its own, so the write lock is only ever held for one chunk.
+
+A dry run counts what would change per column without writing.
+"""
+import time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import QuarantinedPair, Token
+from .validation import NUMBER_LIMITS, PRICE_RANGE
+from .writer import write
+
+CHUNK_SIZE = 20_000
+CHUNK_WHERE = 'id >= %s AND id < %s'
+RECOMMENDATIONS = tuple(choice for choice, label in Token.RECOMMENDATION_CHOICES)
+
+
+def _invalid(column, field):
+    """SQL true when a numeric column holds something that is not a finite number"""
+    if connection.vendor == 'sqlite':
+        # SQLite keeps unparseable input as text; inf is stored as a real
+        kinds = "'integer', 'real', 'null'" if field.null else "'integer', 'real'"
+        return f"(typeof({column}) NOT IN ({kinds}) OR {column} IN (9e999, -9e999))"
+    if connection.vendor == 'postgresql' and field.get_internal_type() == 'DecimalField':
+        return f"({column} = 'NaN')"
+    return None
+
+
+def repair_rules():
+    """[(column, SQL true for a bad value, its params, SQL of the fixed value, its params)]"""
+    rules = []
+    for name, (field, low, high) in NUMBER_LIMITS.items():
+        if name == 'price_usd':
+            continue
+        column = connection.ops.quote_name(field.column)
+        invalid = _invalid(column, field)
+        bad = f"({column} < %s OR {column} > %s)"
+        clamp = f"WHEN {column} < %s THEN %s WHEN {column} > %s THEN %s ELSE {column} END"
+        if invalid:
+            bad = f"({invalid} OR {bad})"
+            clamp = f"WHEN {invalid} THEN {'NULL' if field.null else '0'} {clamp}"
+        rules.append((name, bad, [low, high], f"CASE {clamp}", [low, low, high, high]))
+
+    column = connection.ops.quote_name('recommendation')
+    placeholders = ', '.join(['%s'] * len(RECOMMENDATIONS))
+    rules.append((
+        'recommendation',
+        f"({column} NOT IN ({placeholders}))", list(RECOMMENDATIONS),
+        f"CASE WHEN {column} IN ({placeholders}) THEN {column} ELSE 'HOLD' END", list(RECOMMENDATIONS),
+    ))
+    return rules
+
+
+def rejected_condition():
+    """SQL true for rows that cannot be repaired, with its params; see validation.valid_price"""
+    field = NUMBER_LIMITS['price_usd'][0]
+    low, high = PRICE_RANGE
+    column = connection.ops.quote_name(field.column)
+    invalid = _invalid(column, field)
+    condition = f"(NOT ({column} > %s AND {column} <= %s))"
+    if invalid:
+        condition = f"({invalid} OR {condition})"
+    return condition, [low, high]
+
+
+def _quarantine_rows(table, chunk_where, params):
+    """Move unrepairable rows of a chunk to the quarantine table; returns how many"""
+    condition, condition_params = rejected_condition()
+    price = connection.ops.quote_name('price_usd')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id, pair_address, chain_id, symbol, CAST({price} AS TEXT) FROM {table} "
+            f"WHERE {chunk_where} AND {condition}",
+            params + condition_params,
+        )
+        rows = cursor.fetchall()
+    if not rows:
+        return 0
+    now = timezone.now()
+    QuarantinedPair.objects.bulk_create([
+        QuarantinedPair(
+            pair_address=pair_address,
+            chain_id=chain_id or '',
+            reason=f'repair: price_usd not a valid price: {price_text}'[:200],
+            payload={'source': 'repair', 'id': token_id, 'pair_address': pair_address,
+                     'symbol': symbol, 'price_usd': price_text},
+            received_at=now,
+        )
+        for token_id, pair_address, chain_id, symbol, price_text in rows
+    ])
+    # only('id') keeps the corrupt columns out of the model converters
+    Token.objects.filter(id__in=[row[0] for row in rows]).only('id').delete()
+    return len(rows)
+
+
+def _execute(cursor, statement, chunk_params):
+    sql, before, after = statement
+    cursor.execute(sql, before + chunk_params + after)
+
+
+def _repair_chunk(table, chunk_params, statements, dry_run=False):
+    """Quarantine and repair one id range in its own transaction; returns (rejected, rows, counts)"""
+    with transaction.atomic():
+        if dry_run:
+            with connection.cursor() as cursor:
+                _execute(cursor, statements['rejected'], chunk_params)
+                rejected = cursor.fetchone()[0]
+        else:
+            rejected = _quarantine_rows(table, CHUNK_WHERE, chunk_params)
+        with connection.cursor() as cursor:
+            _execute(cursor, statements['counts'], chunk_params)
+            rows, *counts = cursor.fetchone()
+            if rows and not dry_run:
+                _execute(cursor, statements['update'], chunk_params)
+    return rejected, rows, counts
+
+
+def repair_tokens(dry_run=False, chunk_size=CHUNK_SIZE):
+    """Repair the Token table; returns a report of counts per column.
+
+    'rows' counts the repaired rows and 'rejected' the quarantined ones.
+    With dry_run the counts are what would change and nothing is written.
+    """
+    table = connection.ops.quote_name(Token._meta.db_table)
+    rules = repair_rules()
+    rejected, rejected_params = rejected_condition()
+    report = {name: 0 for name, *rest in rules}
+    report.update({'rejected': 0, 'rows': 0, 'chunks': 0})
+    start = time.perf_counter()
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT MIN(id), MAX(id) FROM {table}")
+        first, last = cursor.fetchone()
+    if first is None:
+        report['seconds'] = 0.0
+        return report
+
+    counts_sql = ', '.join(f"SUM(CASE WHEN {bad} THEN 1 ELSE 0 END)" for name, bad, *rest in rules)
+    counts_params = [param for name, bad, bad_params, *rest in rules for param in bad_params]
+    set_sql = ', '.join(f"{connection.ops.quote_name(name)} = {fixed}" for name, bad, bad_params, fixed, fixed_params in rules)
+    # The next ingest compares repaired rows column by column
+    set_sql += f", {connection.ops.quote_name('fingerprint')} = NULL"
+    set_params = [param for *rest, fixed_params in rules for param in fixed_params]
+    any_bad = ' OR '.join(bad for name, bad, *rest in rules)
+    statements = {
+        'counts': (f"SELECT COUNT(*), {counts_sql} FROM {table} WHERE {CHUNK_WHERE} AND ({any_bad})",
+                   counts_params, counts_params),
+        'update': (f"UPDATE {table} SET {set_sql} WHERE {CHUNK_WHERE} AND ({any_bad})",
+                   set_params, counts_params),
+        'rejected': (f"SELECT COUNT(*) FROM {table} WHERE {CHUNK_WHERE} AND {rejected}",
+                     [], rejected_params),
+    }
+
+    for low_id in range(first, last + 1, chunk_size):
+        chunk_params = [low_id, low_id + chunk_size]
+        report['chunks'] += 1
+        if dry_run:
+            rejected_rows, rows, counts = _repair_chunk(table, chunk_params, statements, dry_run=True)
+        else:
+            rejected_rows, rows, counts = write(_repair_chunk, table, chunk_params, statements)
+        report['rejected'] += rejected_rows
+        report['rows'] += rows
+        for (name, *rest), count in zip(rules, counts):
+            report[name] += count or 0
+
+    report['seconds'] = round(time.perf_counter() - start, 2)
+    return report
@@ -0,0 +1,203 @@
+"""Ingestion replay harness against the local Dexscreener stand-in.
+
+replay_ingest() serves `size` synthetic pairs from a StandinServer and
+runs the real ingest entry points against it:
+
+- update_tokens_from_api, the per-row path, then the batched path. Each
+  runs on an empty table and again with the same data, which exercises
+  the unchanged-row path.
+- fetch_and_analyze_token, for `lookups` pair addresses.
+
+Every run reports:
+- throughput;
+- the seconds spent in each ingest stage (fetch is summed over the
+  crawler's threads);
+- the stand-in's request, 429 and error counts;
+- the INSERT/UPDATE/DELETE statements and rows written per table, on
+  whichever connection ran them: under DB_SINGLE_WRITER that is the
+  writer thread's.
+
+Run it through ``manage.py replay_ingest`` or ``manage.py benchmark replay``.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from unittest import mock
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import override_settings
+
+from . import services
+from .cache import get_search_cache
+from .models import Token
+from .standin import PAGE_SIZE, StandinServer
+from .writer import write
+
+WRITE_SQL = re.compile(r'\s*(?:\d+ times: )?(INSERT INTO|UPDATE|DELETE FROM)\s+"?(\w+)"?', re.IGNORECASE)
+# Ingest stages timed by wrapping the names services.py calls them by
+STAGES = ('validate_pairs', 'append_price_points', 'publish_token_changes', 'refresh_snapshot')
+
+
+class WriteCounter:
+    """connection.execute_wrapper counting write statements and rows per table"""
+
+    def __init__(self):
+        self.statements = Counter()
+        self.rows = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        match = WRITE_SQL.match(sql)
+        if match:
+            verb, table = match.groups()
+            executions = len(params) if many else 1
+            if verb.upper() == 'INSERT INTO':
+                # rowcount is not set for INSERT ... RETURNING; count the VALUES tuples
+                values = re.split(r'\s(?:ON CONFLICT|RETURNING)\b', sql.partition(' VALUES ')[2])[0]
+                rows = values.count('(') * executions
+            else:
+                rows = max(context['cursor'].rowcount, 0)
+            with self._lock:
+                self.statements[table] += executions
+                self.rows[table] += rows
+        return result
+
+    @contextmanager
+    def installed(self):
+        """Count writes on every connection until the block exits.
+
+        That is the caller's connection, the writer thread's and any
+        connection opened meanwhile, such as a crawler thread's.
+        """
+        wrapped = []
+
+        def install(connection, **kwargs):
+            # The wrapper list itself: django.db.connection resolves per thread
+            wrappers = connection.execute_wrappers
+            if self not in wrappers:
+                wrappers.append(self)
+                wrapped.append(wrappers)
+
+        connection_created.connect(install, weak=False)
+        try:
+            install(connection)
+            write(lambda: install(connection))
+            yield self
+        finally:
+            connection_created.disconnect(install)
+            for wrappers in wrapped:
+                wrappers.remove(self)
+
+
+class StageTimer:
+    """Seconds and calls per ingest stage"""
+
+    def __init__(self):
+        self.seconds = Counter()
+        self.calls = Counter()
+
+    def wrap(self, name, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.seconds[name] += time.perf_counter() - start
+                self.calls[name] += 1
+        return timed
+
+    @contextmanager
+    def patched(self):
+        with ExitStack() as stack:
+            get_json = services.DexscreenerService.get_json
+            stack.enter_context(mock.patch.object(
+                services.DexscreenerService, 'get_json', staticmethod(self.wrap('fetch', get_json)),
+            ))
+            for name in STAGES:
+                stack.enter_context(mock.patch.object(services, name, self.wrap(name, getattr(services, name))))
+            yield self
+
+
+def standin_pairs(size, page_size=PAGE_SIZE, seed=3):
+    """Synthetic pairs grouped into symbols of page_size pairs each, and those symbols.
+
+    Crawling the symbols as seeds finds every pair, like a seed list would upstream.
+    """
+    from .benchmarks import synthetic_pairs
+    pairs = synthetic_pairs(size, seed=seed)
+    for i, pair in enumerate(pairs):
+        pair['baseToken']['symbol'] = f'S{i // page_size:05d}'
+    return pairs, sorted({pair['baseToken']['symbol'] for pair in pairs})
+
+
+def _measure(scenario, run, standin, func):
+    timer, writes = StageTimer(), WriteCounter()
+    before = dict(standin.counts)
+    with timer.patched(), writes.installed():
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+    # result is how many pairs the entry point processed, False if it failed
+    row = {
+        'scenario': scenario,
+        'run': run,
+        'pairs': int(result or 0),
+        'seconds': round(elapsed, 3),
+        'pairs_per_sec': round((result or 0) / elapsed) if elapsed else None,
+    }
+    for name in ('requests', 'throttled', 'errors'):
+        row[name] = standin.counts[name] - before.get(name, 0)
+    for name in ('fetch', *STAGES):
+        row[f'{name}_s'] = round(timer.seconds[name], 3)
+    row['write_statements'] = sum(writes.statements.values())
+    row['rows_written'] = sum(writes.rows.values())
+    row['token_rows_written'] = writes.rows[Token._meta.db_table]
+    return row
+
+
+def replay_ingest(size=2_000, latency=0.01, error_rate=0.0, rate_limit=None, lookups=200,
+                  page_size=PAGE_SIZE, client_limits=False):
+    """Run the ingest entry points against a stand-in serving size pairs; one report row per run.
+
+    Unless client_limits is set, the client-side rate limiter is lifted so
+    the stand-in's own rate_limit is what throttles.
+    """
+    pairs, seeds = standin_pairs(size, page_size)
+    overrides = {
+        'CRAWL_SEEDS': {'BSC': seeds},
+        'CRAWL_MAX_QUERIES': len(seeds),
+        'SEARCH_CACHE': {'MAX_ENTRIES': lookups or 1},
+    }
+    if not client_limits:
+        overrides.update(DEXSCREENER_RATE_LIMITS={'search': 10 ** 9, 'tokens': 10 ** 9}, DEXSCREENER_RATE_BURST=10 ** 6)
+
+    results = []
+    with StandinServer(pairs, latency, error_rate, rate_limit, page_size=page_size) as standin, \
+            override_settings(**overrides), \
+            mock.patch.object(services.DexscreenerService, 'BASE_URL', standin.base_url):
+        services.DexscreenerService.close_session()
+        try:
+            for scenario, batched in (('update_tokens', False), ('update_tokens_batched', True)):
+                Token.objects.all().delete()
+                for run in ('empty', 'repeat'):
+                    results.append(_measure(
+                        scenario, run, standin, lambda: services.update_tokens_from_api(batched=batched, chain='BSC'),
+                    ))
+
+            addresses = [pair['pairAddress'] for pair in pairs[::max(1, size // lookups)]][:lookups]
+            for run in ('empty', 'cached'):
+                if run == 'empty':
+                    Token.objects.all().delete()
+                    get_search_cache().clear()
+                results.append(_measure(
+                    'fetch_and_analyze_token', run, standin,
+                    lambda: sum(services.fetch_and_analyze_token(address, 'address') is not None for address in addresses),
+                ))
+        finally:
+            services.DexscreenerService.close_session()
+    Token.objects.all().delete()
+    return results
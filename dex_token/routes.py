@@ -0,0 +1,179 @@
+"""Latency and query-count suite for every route in dex_token/urls.py.
+
+ROUTES lists one or more requests per URL name, each with a budget: the
+most SQL queries one request may run. Routes behind data_conditional
+include the data generation read they pay when their process's cached
+generation has expired. The budgets are enforced by
+RouteQueryBudgetTest; a route added to urls.py without an entry here (or
+in UNBENCHED) fails that test too.
+
+bench_routes() seeds a fixture of N tokens, then drives every request with
+`concurrency` threads, each with its own client and database connection.
+It reports p50/p95/p99 latency and the queries per request. Requests that
+reach upstream go to a local Dexscreener stand-in.
+"""
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.db import connection, connections
+from django.test import Client
+
+# URL names deliberately left out, with the reason
+UNBENCHED = {
+    'api_token_stream': 'long-lived Server-Sent Events stream; measured by `benchmark live`',
+}
+
+
+class Route:
+    """One request against a named route; {token} in path is a fixture token id"""
+    __slots__ = ('name', 'path', 'params', 'method', 'budget', 'label')
+
+    def __init__(self, name, path, budget, params=None, method='GET', label=None):
+        self.name = name
+        self.path = path
+        self.params = params or {}
+        self.method = method
+        self.budget = budget
+        self.label = label or name
+
+    def url(self, token_id):
+        return self.path.format(token=token_id)
+
+
+ROUTES = [
+    Route('dashboard', '/', budget=2),
+    Route('explorer', '/explorer/', budget=2),
+    # Checker hits rank every match, then load the winner
+    Route('checker', '/checker/', budget=2, params={'search': 'TK150', 'type': 'name'}, label='checker_symbol'),
+    Route('checker', '/checker/', budget=2, params={'search': '0xT150', 'type': 'address'}, label='checker_address'),
+    Route('detail', '/token/{token}/', budget=2),
+    Route('recommendations', '/recommendations/', budget=2),
+    Route('about', '/about/', budget=0),
+    Route('api_tokens', '/api/tokens/', budget=3),
+    Route('api_tokens', '/api/tokens/', budget=3, params={'ordering': '-volume_24h', 'recommendation': 'BUY', 'page': 3},
+          label='api_tokens_filtered'),
+    Route('api_tokens', '/api/tokens/', budget=2, params={'pagination': 'cursor', 'fields': 'id,symbol,price_usd'},
+          label='api_tokens_cursor'),
+    Route('api_tokens_export', '/api/tokens/export/', budget=3, params={'symbol': 'TK150', 'format': 'csv'}),
+    Route('api_token_detail', '/api/tokens/{token}/', budget=2),
+    Route('api_token_history', '/api/tokens/{token}/history/', budget=2),
+    Route('api_recommendations', '/api/recommendations/', budget=3),
+    # Upstream routes run against the stand-in; an ingest of one 30-pair search page
+    Route('api_update_tokens', '/api/update-tokens/', budget=17, method='POST'),
+    Route('api_update_single_token', '/api/update-token/{token}/', budget=20, method='POST'),
+    Route('api_upstream_status', '/api/upstream/', budget=0),
+    Route('api_checker', '/api/checker/', budget=2, params={'search': 'TK150', 'type': 'name'}),
+    Route('metrics', '/metrics', budget=0),
+]
+
+
+class QueryCounter:
+    """connection.execute_wrapper counting the queries of one thread's connection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def request(client, route, token_id):
+    """Issue one request and consume its body; returns (status, queries run)"""
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        if route.method == 'POST':
+            response = client.post(route.url(token_id), route.params)
+        else:
+            response = client.get(route.url(token_id), route.params)
+        if response.streaming:
+            # The test client closes streaming responses once consumed
+            for chunk in response.streaming_content:
+                pass
+    return response.status_code, counter.count
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def drive(route, token_id, requests, concurrency):
+    """Run a route `requests` times over `concurrency` threads; latencies in ms, query counts, statuses"""
+    latencies, queries, statuses = [], [], Counter()
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def worker():
+        client = Client()
+        try:
+            while True:
+                with lock:
+                    if not remaining[0]:
+                        return
+                    remaining[0] -= 1
+                start = time.perf_counter()
+                status, count = request(client, route, token_id)
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    queries.append(count)
+                    statuses[status] += 1
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, queries, statuses
+
+
+def bench_routes(sizes=(10_000, 100_000, 1_000_000), requests=200, concurrency=8):
+    """p50/p95/p99 latency and queries per request for every route at each fixture size"""
+    from unittest import mock
+
+    from django.conf import settings
+    from django.test import override_settings
+
+    from .benchmarks import fill_tokens, synthetic_pairs
+    from .models import Token
+    from .services import DexscreenerService
+    from .standin import StandinServer
+    from .summary import refresh_snapshot
+
+    results = []
+    with StandinServer(synthetic_pairs(200, seed=11)) as standin, \
+            mock.patch.object(DexscreenerService, 'BASE_URL', standin.base_url), \
+            override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                              DEXSCREENER_RATE_LIMITS={'search': 10 ** 9}, DEXSCREENER_RATE_BURST=10 ** 6):
+        for size in sizes:
+            Token.objects.all().delete()
+            fill_tokens(size)
+            refresh_snapshot()
+            token_id = Token.objects.filter(pair_address='0xP150').values_list('id', flat=True).get()
+            for route in ROUTES:
+                # One warm-up request outside the measurement
+                request(Client(), route, token_id)
+                latencies, queries, statuses = drive(route, token_id, requests, concurrency)
+                results.append({
+                    'size': size,
+                    'route': route.label,
+                    'method': route.method,
+                    'concurrency': concurrency,
+                    'requests': requests,
+                    'p50_ms': round(percentile(latencies, 0.50), 2),
+                    'p95_ms': round(percentile(latencies, 0.95), 2),
+                    'p99_ms': round(percentile(latencies, 0.99), 2),
+                    'mean_ms': round(statistics.fmean(latencies), 2),
+                    'queries': max(queries),
+                    'budget': route.budget,
+                    'over_budget': max(queries) > route.budget,
+                    'statuses': ','.join(f'{status}x{count}' for status, count in sorted(statuses.items())),
+                })
+        DexscreenerService.close_session()
+    Token.objects.all().delete()
+    return results
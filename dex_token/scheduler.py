@@ -0,0 +1,78 @@
+"""Periodic ingestion, decoupled from the request path.
+
+Each chain in settings.INGEST_SCHEDULE is ingested on its own cadence,
+either by Celery beat (dex_token.tasks) or in-process by
+``manage.py run_scheduler`` when no broker is available. Overlapping runs
+of the same chain are prevented with the refresh coordinator's lock and
+every run is recorded as an IngestRun.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from .models import IngestRun
+from .refresh import RefreshCoordinator, RefreshTimeout
+from .services import ingest_chain
+
+
+def ingest_coordinator(chain, wait=False):
+    """Coordinator shared by scheduled, API and command runs of a chain.
+
+    Scheduled runs do not wait: if the chain is already being ingested they
+    are skipped. Waiting callers join the in-flight run instead.
+    """
+    if wait:
+        return RefreshCoordinator(f'ingest_{chain.lower()}')
+    return RefreshCoordinator(f'ingest_{chain.lower()}', freshness=0, timeout=0)
+
+
+def _ingest_and_record(chain, trigger, options):
+    run = IngestRun.objects.create(chain=chain, trigger=trigger)
+    try:
+        stats = ingest_chain(chain, **options)
+    except Exception as e:
+        run.finish(IngestRun.FAILED, error=str(e))
+        raise
+    if stats is None:
+        run.finish(IngestRun.FAILED, error='Upstream fetch failed')
+    else:
+        run.finish(IngestRun.SUCCESS, **stats)
+    return stats
+
+
+def run_ingest(chain, trigger=IngestRun.SCHEDULE, wait=False, **options):
+    """Ingest one chain unless another run of it is in progress.
+
+    Returns (stats, status) like RefreshCoordinator.run; stats is None when
+    the upstream fetch failed or the run was skipped. Waiting callers get
+    RefreshTimeout when the in-flight run outlasts REFRESH_LOCK_TIMEOUT.
+    options (depth, fetch) are passed to ingest_chain.
+    """
+    try:
+        return ingest_coordinator(chain, wait).run(lambda: _ingest_and_record(chain, trigger, options))
+    except RefreshTimeout:
+        run = IngestRun.objects.create(chain=chain, trigger=trigger)
+        run.finish(IngestRun.SKIPPED, error='Previous run still in progress')
+        if wait:
+            raise
+    return None, IngestRun.SKIPPED
+
+
+def due_chains(now=None):
+    """Chains whose last non-skipped run is older than their cadence"""
+    now = now or timezone.now()
+    due = []
+    for chain, every in settings.INGEST_SCHEDULE.items():
+        last = (
+            IngestRun.objects.filter(chain=chain)
+            .exclude(status=IngestRun.SKIPPED)
+            .values_list('started_at', flat=True)
+            .first()
+        )
+        if last is None or (now - last).total_seconds() >= every:
+            due.append(chain)
+    return due
+
+
+def run_due(now=None):
+    """Run every due chain in this process; returns {chain: coordinator status}"""
+    return {chain: run_ingest(chain)[1] for chain in due_chains(now)}
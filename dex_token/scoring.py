@@ -0,0 +1,234 @@
+"""Rules-driven scoring for TokenAnalyzer, one pair at a time or in batches.
+
+Thresholds come from a declarative rules table that can be replaced with a
+JSON file (settings.SCORING_RULES_FILE) without a code change. Ingest
+scores each decoded pair with score_values()/recommend_value();
+analyze_columns() computes scores, recommendations and volatility for N
+pairs at once from NumPy columns. Both read the same table and give
+identical results. TokenAnalyzer.score_metrics and get_recommendation keep
+the default table's thresholds as hand-written code, the reference both
+are tested against.
+"""
+import json
+import operator
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Each metric is a list of bands; the first band whose bounds all hold
+# awards its points. Bounds are gt/gte/lt/lte, like Django lookups.
+DEFAULT_SCORING_RULES = {
+    'metrics': {
+        'volume_24h': [
+            {'gt': 1_000_000, 'points': 30},
+            {'gt': 100_000, 'points': 20},
+            {'gt': 10_000, 'points': 10},
+        ],
+        'price_change_24h': [
+            {'gt': 0, 'lte': 20, 'points': 25},
+            {'gte': -5, 'lt': 0, 'points': 15},
+            {'gt': 20, 'points': 5},
+        ],
+        'liquidity': [
+            {'gt': 500_000, 'points': 25},
+            {'gt': 100_000, 'points': 15},
+            {'gt': 50_000, 'points': 10},
+        ],
+        'market_cap': [
+            {'gte': 1_000_000, 'lte': 100_000_000, 'points': 20},
+            {'gt': 100_000_000, 'points': 15},
+            {'gt': 100_000, 'points': 10},
+        ],
+    },
+    'max_score': 100,
+    # First matching rule wins; 'score' refers to the capped total
+    'recommendations': [
+        {'recommendation': 'BUY', 'when': {'score': {'gte': 70}, 'price_change_24h': {'gt': -10}}},
+        {'recommendation': 'HOLD', 'when': {'score': {'gte': 40}}},
+    ],
+    'default_recommendation': 'AVOID',
+}
+
+BOUNDS = {
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+}
+METRIC_COLUMNS = ('volume_24h', 'price_change_24h', 'liquidity', 'market_cap')
+VOLATILITY_COLUMNS = ('price_change_1h', 'price_change_6h', 'price_change_24h')
+
+
+def _check_numbers(values, where):
+    if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+        raise ImproperlyConfigured(f'Thresholds and points must be numbers: {where}')
+
+
+def validate_rules(rules):
+    """Raise ImproperlyConfigured if a rules table is malformed"""
+    try:
+        for metric, bands in rules['metrics'].items():
+            if metric not in METRIC_COLUMNS:
+                raise ImproperlyConfigured(f"Unknown scoring metric '{metric}'")
+            for band in bands:
+                if 'points' not in band or not set(band) - {'points'} <= set(BOUNDS):
+                    raise ImproperlyConfigured(f"Invalid band for '{metric}': {band}")
+                _check_numbers(band.values(), band)
+        int(rules['max_score'])
+        for rule in rules['recommendations']:
+            for column, bounds in rule['when'].items():
+                if column not in METRIC_COLUMNS + ('score',) or not set(bounds) <= set(BOUNDS):
+                    raise ImproperlyConfigured(f"Invalid recommendation rule: {rule}")
+                _check_numbers(bounds.values(), rule)
+        str(rules['default_recommendation'])
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise ImproperlyConfigured(f'Invalid scoring rules: {e}')
+    return rules
+
+
+_loaded_rules = {}
+
+
+def get_scoring_rules():
+    """Rules table from settings.SCORING_RULES_FILE, or the defaults"""
+    path = getattr(settings, 'SCORING_RULES_FILE', None)
+    if not path:
+        return DEFAULT_SCORING_RULES
+    if path not in _loaded_rules:
+        with open(path) as f:
+            _loaded_rules[path] = validate_rules(json.load(f))
+    return _loaded_rules[path]
+
+
+OPERATORS = {'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+_compiled = {}
+
+
+def _compile(rules):
+    """Generate straight-line score and recommendation functions for a rules table.
+
+    Each band becomes an if/elif on its bounds, like the hand-written
+    thresholds they replace, so per-pair scoring at ingest stays cheap.
+    validate_rules() ensures every threshold is a number literal.
+    """
+    entry = _compiled.get(id(rules))
+    if entry is not None and entry[0] is rules:
+        return entry[1], entry[2]
+    namespace = {}
+
+    def condition(column, bounds):
+        terms = [f'{column} {OPERATORS[bound]} {threshold!r}' for bound, threshold in bounds.items()]
+        return ' and '.join(terms) or 'True'
+
+    lines = ['def _score(volume_24h, price_change_24h, liquidity, market_cap):', '    score = 0']
+    for metric, bands in rules['metrics'].items():
+        for index, band in enumerate(bands):
+            bounds = {bound: threshold for bound, threshold in band.items() if bound != 'points'}
+            lines.append(f"    {'if' if index == 0 else 'elif'} {condition(metric, bounds)}:")
+            lines.append(f"        score += {int(band['points'])}")
+    lines.append(f"    return min(score, {int(rules['max_score'])})")
+
+    lines.append('def _recommend(score, price_change_24h, volume_24h=None, liquidity=None, market_cap=None):')
+    for rule in rules['recommendations']:
+        terms = [condition(column, bounds) for column, bounds in rule['when'].items()]
+        lines.append(f"    if {' and '.join(terms) or 'True'}:")
+        lines.append(f"        return {str(rule['recommendation'])!r}")
+    lines.append(f"    return {str(rules['default_recommendation'])!r}")
+    exec('\n'.join(lines), namespace)
+    _compiled[id(rules)] = (rules, namespace['_score'], namespace['_recommend'])
+    return namespace['_score'], namespace['_recommend']
+
+
+def scorers(rules=None):
+    """(score, recommend) functions of the current rules table for scoring pairs one by one.
+
+    score(volume_24h, price_change_24h, liquidity, market_cap) and
+    recommend(score, price_change_24h, volume_24h, liquidity, market_cap)
+    are the scalar forms of score_columns and recommend_columns.
+    """
+    return _compile(rules or get_scoring_rules())
+
+
+def score_values(volume_24h, price_change_24h, liquidity, market_cap, rules=None):
+    """Analysis score of one pair"""
+    return scorers(rules)[0](volume_24h, price_change_24h, liquidity, market_cap)
+
+
+def recommend_value(score, price_change_24h, rules=None, volume_24h=None, liquidity=None, market_cap=None):
+    """Recommendation of one pair; rules on other metrics need those passed"""
+    return scorers(rules)[1](score, price_change_24h, volume_24h, liquidity, market_cap)
+
+
+def _column(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _matches(columns, bounds):
+    mask = None
+    for bound, threshold in bounds.items():
+        hit = BOUNDS[bound](columns, threshold)
+        mask = hit if mask is None else mask & hit
+    return mask
+
+
+def score_columns(volume_24h, price_change_24h, liquidity, market_cap, rules=None):
+    """Analysis scores for N pairs, same as score_values"""
+    rules = rules or get_scoring_rules()
+    columns = {
+        'volume_24h': _column(volume_24h),
+        'price_change_24h': _column(price_change_24h),
+        'liquidity': _column(liquidity),
+        'market_cap': _column(market_cap),
+    }
+    score = np.zeros(len(columns['volume_24h']), dtype=np.int64)
+    for metric, bands in rules['metrics'].items():
+        values = columns[metric]
+        conditions = [_matches(values, {k: v for k, v in band.items() if k != 'points'}) for band in bands]
+        score += np.select(conditions, [band['points'] for band in bands], default=0)
+    return np.minimum(score, rules['max_score'])
+
+
+def recommend_columns(score, price_change_24h, rules=None, **metrics):
+    """Recommendations for N pairs, same as recommend_value"""
+    rules = rules or get_scoring_rules()
+    columns = {name: _column(values) for name, values in metrics.items()}
+    columns['score'] = np.asarray(score)
+    columns['price_change_24h'] = _column(price_change_24h)
+
+    conditions = []
+    for rule in rules['recommendations']:
+        mask = np.ones(len(columns['score']), dtype=bool)
+        for column, bounds in rule['when'].items():
+            mask &= _matches(columns[column], bounds)
+        conditions.append(mask)
+    choices = [rule['recommendation'] for rule in rules['recommendations']]
+    return np.select(conditions, choices, default=rules['default_recommendation']).astype(object)
+
+
+def volatility_columns(price_change_1h, price_change_6h, price_change_24h):
+    """Volatility index for N pairs, same as TokenAnalyzer.volatility_from_changes"""
+    changes = [np.abs(_column(values)) for values in (price_change_1h, price_change_6h, price_change_24h)]
+    total = changes[0] + changes[1] + changes[2]
+    nonzero = (changes[0] > 0).astype(np.int64) + (changes[1] > 0) + (changes[2] > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(nonzero > 0, total / np.maximum(nonzero, 1), 0.0)
+
+
+def analyze_columns(volume_24h, price_change_1h, price_change_6h, price_change_24h,
+                    liquidity, market_cap, rules=None):
+    """Score, recommend and measure volatility for N pairs at once.
+
+    Returns a dict of equally sized arrays: score, recommendation, volatility.
+    """
+    rules = rules or get_scoring_rules()
+    score = score_columns(volume_24h, price_change_24h, liquidity, market_cap, rules)
+    recommendation = recommend_columns(
+        score, price_change_24h, rules,
+        volume_24h=volume_24h, liquidity=liquidity, market_cap=market_cap,
+    )
+    return {
+        'score': score,
+        'recommendation': recommendation,
+        'volatility': volatility_columns(price_change_1h, price_change_6h, price_change_24h),
+    }
@@ -1,13 +1,114 @@
-from rest_framework import serializers
+import decimal
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
 from .models import Token
 
 class TokenSerializer(serializers.ModelSerializer):
     class Meta:
         model = Token
-        fields = '__all__'
+        exclude = ['fingerprint']
         
 class TokenListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Token
         fields = ['id', 'name', 'symbol', 'price_usd', 'market_cap', 'volume_24h', 
                  'price_change_24h', 'recommendation', 'analysis_score']
+
+
+# Fields whose representation of a database value is the value itself
+IDENTITY_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.ChoiceField,
+                   serializers.BooleanField, serializers.FloatField)
+
+
+def _decimal_encoder(field):
+    if not getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING) or field.localize:
+        return field.to_representation
+    if field.decimal_places is None:
+        return '{:f}'.format
+    quantum = decimal.Decimal('.1') ** field.decimal_places
+    rounding = field.rounding
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def encode(value):
+        return '{:f}'.format(value.quantize(quantum, rounding=rounding, context=context))
+    return encode
+
+
+def _iso_datetime(value, tz):
+    # DateTimeField.to_representation for aware values in ISO 8601
+    value = value.astimezone(tz).isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def _is_plain_iso_datetime(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    return (settings.USE_TZ and not hasattr(field, 'timezone')
+            and isinstance(output_format, str) and output_format.lower() == ISO_8601)
+
+
+class ValuesEncoder:
+    """Encode values() rows with the same output as a ModelSerializer.
+
+    Each field gets one encoder when the class is built; a row is then a
+    dict comprehension over plain values, with no serializer or model
+    instance per row.
+    """
+
+    def __init__(self, serializer_class):
+        self.fields = serializer_class().fields
+        self.encoders = {name: self._encoder(field) for name, field in self.fields.items()}
+        # Converted in the timezone active for each encode() call
+        self.datetimes = {
+            name for name, field in self.fields.items()
+            if isinstance(field, serializers.DateTimeField) and _is_plain_iso_datetime(field)
+        }
+
+    @staticmethod
+    def _encoder(field):
+        if isinstance(field, serializers.DecimalField):
+            return _decimal_encoder(field)
+        if isinstance(field, IDENTITY_FIELDS):
+            return None
+        return field.to_representation
+
+    def select(self, requested=None):
+        """Field names to encode, in serializer order; all of them by default"""
+        if not requested:
+            return list(self.fields)
+        requested = {name.strip() for name in requested.split(',') if name.strip()}
+        unknown = requested - set(self.fields)
+        if unknown or not requested:
+            raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown)) or '(none given)'}"})
+        return [name for name in self.fields if name in requested]
+
+    def encode(self, rows, names):
+        tz = timezone.get_current_timezone() if self.datetimes else None
+        plan = [(name, self.encoders[name]) for name in names]
+        encoded = []
+        for row in rows:
+            item = {}
+            for name, encoder in plan:
+                value = row[name]
+                if encoder is None or value is None:
+                    item[name] = value
+                elif name in self.datetimes:
+                    item[name] = _iso_datetime(value, tz)
+                else:
+                    item[name] = encoder(value)
+            encoded.append(item)
+        return encoded
+
+
+_encoders = {}
+
+
+def get_values_encoder(serializer_class):
+    if serializer_class not in _encoders:
+        _encoders[serializer_class] = ValuesEncoder(serializer_class)
+    return _encoders[serializer_class]
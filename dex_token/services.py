@@ -1,103 +1,138 @@
+import hashlib
+import itertools
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 from django.utils import timezone
-from datetime import datetime
-import pytz
 import decimal
 from decimal import Decimal
+from django.db import connection, models, transaction
 from .models import Token
+from .analysis import TokenAnalyzer
+from .cache import get_search_cache
+from .history import append_price_points
+from .live import LIVE_FIELDS, publish_token_changes
+from .metrics import stage, upstream_failed
+from .summary import refresh_snapshot
+from .upstream import call as upstream_call
+from .validation import validate_pairs
+from .writer import serialized
+
+logger = logging.getLogger(__name__)
 
 class DexscreenerService:
-    BASE_URL = 'https://api.dexscreener.com/latest/dex'
+    BASE_URL = settings.DEXSCREENER_API_URL
     # BASE_URL = 'https://api.dexscreener.com/latest/dex/search?q='
+    TIMEOUT = 10
+
+    _session = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls):
+        """Long-lived session so connections are reused across calls"""
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    pool_size = getattr(settings, 'DEXSCREENER_POOL_SIZE', 32)
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+                    session = requests.Session()
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers['Accept'] = 'application/json'
+                    cls._session = session
+        return cls._session
+
+    @classmethod
+    def close_session(cls):
+        with cls._session_lock:
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
+
+    @classmethod
+    def get_json(cls, path, params=None, wait=None):
+        """GET a Dexscreener endpoint on the pooled session; raises on errors.
+
+        The request is rate limited, retried and guarded by the circuit
+        breaker (see dex_token.upstream); wait is the longest the caller
+        waits for the rate limiter.
+        """
+        response = upstream_call(
+            path,
+            lambda: cls.get_session().get(f"{cls.BASE_URL}{path}", params=params, timeout=cls.TIMEOUT),
+            wait=wait,
+        )
+        return response.json()
     
     @classmethod
     def fetch_tokens(cls, chain='BSC', limit=50):
-        """Fetch tokens from Dexscreener API"""
-        try:
-            url = f"{cls.BASE_URL}/tokens"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            print(f"Error fetching tokens: {e}")
+        """Fetch up to limit pairs of one chain, as {'pairs': [...]}"""
+        from .crawler import chain_id
+        data = cls.fetch_pairs(chain)
+        if not data or not isinstance(data.get('pairs'), list):
             return None
+        wanted = chain_id(chain)
+        pairs = [pair for pair in data['pairs'] if str(pair.get('chainId', '')).lower() == wanted]
+        return {'pairs': pairs[:limit]}
     
     @classmethod
     def fetch_pairs(cls, chain='BSC'):
         """Fetch trading pairs from Dexscreener API"""
         try:
-            url = f"{cls.BASE_URL}/search?q={chain}"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            return cls.get_json('/search', params={'q': chain})
         except requests.RequestException as e:
-            print(f"Error fetching pairs: {e}")
+            upstream_failed('fetch_pairs', e)
+            logger.warning('Fetching %s pairs failed: %s', chain, e)
             return None
 
-class TokenAnalyzer:
-    @staticmethod
-    def calculate_analysis_score(token_data):
-        """Calculate analysis score based on multiple metrics"""
-        score = 0
-        
-        # Volume score (0-30 points)
-        volume_24h = float(token_data.get('volume', {}).get('h24', 0))
-        if volume_24h > 1_000_000:  # > 1M
-            score += 30
-        elif volume_24h > 100_000:  # > 100K
-            score += 20
-        elif volume_24h > 10_000:  # > 10K
-            score += 10
-        
-        # Price change score (0-25 points)
-        price_change_24h = float(token_data.get('priceChange', {}).get('h24', 0))
-        if 0 < price_change_24h <= 20:  # Positive but not too high
-            score += 25
-        elif -5 <= price_change_24h < 0:  # Small negative
-            score += 15
-        elif price_change_24h > 20:  # Too high, risky
-            score += 5
-        
-        # Liquidity score (0-25 points)
-        liquidity = float(token_data.get('liquidity', {}).get('usd', 0))
-        if liquidity > 500_000:  # > 500K
-            score += 25
-        elif liquidity > 100_000:  # > 100K
-            score += 15
-        elif liquidity > 50_000:  # > 50K
-            score += 10
-        
-        # Market cap score (0-20 points)
-        market_cap = float(token_data.get('marketCap', 0))
-        if 1_000_000 <= market_cap <= 100_000_000:  # 1M-100M sweet spot
-            score += 20
-        elif market_cap > 100_000_000:  # > 100M
-            score += 15
-        elif market_cap > 100_000:  # > 100K
-            score += 10
-        
-        return min(score, 100)  # Cap at 100
-    
-    @staticmethod
-    def get_recommendation(score, price_change_24h):
-        """Get buy/hold/avoid recommendation"""
-        if score >= 70 and price_change_24h > -10:
-            return 'BUY'
-        elif score >= 40:
-            return 'HOLD'
-        else:
-            return 'AVOID'
-    
-    @staticmethod
-    def calculate_volatility_index(token_data):
-        """Calculate volatility index"""
-        price_changes = [
-            abs(float(token_data.get('priceChange', {}).get('h1', 0))),
-            abs(float(token_data.get('priceChange', {}).get('h6', 0))),
-            abs(float(token_data.get('priceChange', {}).get('h24', 0))),
-        ]
-        return sum(price_changes) / len([x for x in price_changes if x > 0]) if any(price_changes) else 0
+    @classmethod
+    def search(cls, query):
+        """Search pairs matching a token name, symbol or address.
+
+        Responses, including empty ones, are served from the search cache
+        while fresh; see dex_token.cache.
+        """
+        return get_search_cache().get_or_fetch(query, lambda: cls.search_upstream(query))
+
+    @classmethod
+    def search_upstream(cls, query, wait=None):
+        """Uncached search request"""
+        try:
+            return cls.get_json('/search/', params={'q': query}, wait=wait)
+        except requests.RequestException as e:
+            upstream_failed('search', e)
+            logger.warning('Searching pairs for %r failed: %s', query, e)
+            return None
+
+    @classmethod
+    def fetch_many(cls, queries, max_in_flight=None):
+        """Search many queries concurrently on the pooled session.
+
+        At most max_in_flight requests run at once. Yields (query, data)
+        tuples as each response completes; data is None on failure. The
+        search cache is bypassed so bulk fetches always see fresh data.
+        Requests wait up to DEXSCREENER_BULK_RATE_WAIT for the rate limiter.
+        """
+        max_in_flight = max_in_flight or getattr(settings, 'DEXSCREENER_MAX_IN_FLIGHT', 8)
+        rate_wait = settings.DEXSCREENER_BULK_RATE_WAIT
+        queries = iter(queries)
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            pending = {}
+            for query in itertools.islice(queries, max_in_flight):
+                pending[executor.submit(cls.search_upstream, query, rate_wait)] = query
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    query = pending.pop(future)
+                    for next_query in itertools.islice(queries, 1):
+                        pending[executor.submit(cls.search_upstream, next_query, rate_wait)] = next_query
+                    yield query, future.result()
 
 def safe_decimal(value, default=0):
     """Safely convert value to Decimal"""
@@ -113,149 +148,372 @@ def fetch_and_analyze_token(search_query, search_type='name'):
     """Fetch and analyze a single token from API"""
     try:
         # Search in existing API data first
-        url = f"{DexscreenerService.BASE_URL}/search/?q={search_query}"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = DexscreenerService.search(search_query)
         
-        if not data.get('pairs'):
+        if not data or not data.get('pairs'):
             return None
             
         # Get the first matching pair
-        pair_data = data['pairs'][0]
-        base_token = pair_data.get('baseToken', {})
-        
-        if not base_token.get('address'):
+        with stage('validate'):
+            records = validate_pairs(data['pairs'][:1])
+        if not records:
             return None
-            
-        # Extract and process data
-        info = pair_data.get('info', {})
-        websites = info.get('websites', [])
-        socials = info.get('socials', [])
-        txns_24h = pair_data.get('txns', {}).get('h24', {})
-        
-        # Process socials
-        twitter = next((s.get('handle') for s in socials if s.get('platform') == 'twitter'), None)
-        telegram = next((s.get('handle') for s in socials if s.get('platform') == 'telegram'), None)
-        discord = next((s.get('handle') for s in socials if s.get('platform') == 'discord'), None)
-        
-        # Calculate analysis metrics
-        analyzer = TokenAnalyzer()
-        score = analyzer.calculate_analysis_score(pair_data)
-        price_change_24h = float(pair_data.get('priceChange', {}).get('h24', 0))
-        recommendation = analyzer.get_recommendation(score, price_change_24h)
-        volatility = analyzer.calculate_volatility_index(pair_data)
-        
+        record = records[0]
+
         # Create or update token
-        token, created = Token.objects.update_or_create(
-            pair_address=pair_data.get('pairAddress', ''),
-            defaults={
-                'name': base_token.get('name', 'Unknown'),
-                'symbol': base_token.get('symbol', 'UNK'),
-                'token_address': base_token.get('address'),
-                'chain_id': pair_data.get('chainId'),
-                'dex_id': pair_data.get('dexId'),
-                'price_usd': safe_decimal(pair_data.get('priceUsd', 0)),
-                'price_native': safe_decimal(pair_data.get('priceNative', 0)),
-                'market_cap': int(float(pair_data.get('marketCap', 0))),
-                'fdv': int(float(pair_data.get('fdv', 0))) if pair_data.get('fdv') else None,
-                'volume_24h': int(float(pair_data.get('volume', {}).get('h24', 0))),
-                'liquidity': int(float(pair_data.get('liquidity', {}).get('usd', 0))),
-                'price_change_24h': safe_decimal(price_change_24h),
-                'price_change_1h': safe_decimal(pair_data.get('priceChange', {}).get('h1', 0)),
-                'price_change_7d': safe_decimal(pair_data.get('priceChange', {}).get('h7d', 0)),
-                'buys_24h': txns_24h.get('buys'),
-                'sells_24h': txns_24h.get('sells'),
-                'image_url': info.get('imageUrl'),
-                'website_url': websites[0].get('url') if websites else None,
-                'twitter_handle': twitter,
-                'telegram_handle': telegram,
-                'discord_handle': discord,
-                'pair_created_at': datetime.fromtimestamp(pair_data.get('pairCreatedAt', 0) / 1000, tz=pytz.UTC) if pair_data.get('pairCreatedAt') else None,
-                'recommendation': recommendation,
-                'analysis_score': safe_decimal(score),
-                'volatility_index': safe_decimal(volatility),
-                'stop_loss_level': safe_decimal(float(pair_data.get('priceUsd', 0)) * 0.9),
-                'suggested_position_size': safe_decimal('5.0') if recommendation == 'BUY' else safe_decimal('2.0'),
-            }
-        )
+        stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        token = upsert_record(record, stats)
+        if stats['inserted'] or stats['updated']:
+            publish_changes()
         return token
         
-    except Exception as e:
-        print(f"Error fetching token: {e}")
+    except Exception:
+        logger.exception('Looking up token %r failed', search_query)
         return None
 
-def update_tokens_from_api():
-    """Update token data from Dexscreener API"""
-    service = DexscreenerService()
-    analyzer = TokenAnalyzer()
-    
+
+@serialized
+def publish_changes():
+    """Rebuild the dashboard snapshot, which bumps the data generation"""
+    with stage('snapshot'):
+        refresh_snapshot()
+
+
+def live_changes(current, defaults):
+    """LIVE_FIELDS values that differ from the stored row; all of them for a new row"""
+    if current is None:
+        return {name: defaults[name] for name in LIVE_FIELDS}
+    changed = {}
+    for name in LIVE_FIELDS:
+        field = Token._meta.get_field(name)
+        if _comparable(field, defaults[name]) != _comparable(field, current[name]):
+            changed[name] = defaults[name]
+    return changed
+
+
+@serialized
+def upsert_record(record, stats=None):
+    """Insert or update a decoded pair and append its price snapshot.
+
+    An unchanged pair is not written; a changed one only gets its changed
+    columns written. The outcome is counted in stats ({'inserted': n,
+    'updated': n, 'unchanged': n}, as returned by bulk_upsert_tokens) when
+    given.
+    """
+    defaults = record.defaults()
+    digest = fingerprint(defaults)
+    with transaction.atomic():
+        token = Token.objects.filter(pair_address=record.pair_address).first()
+        if token is None:
+            token, created = Token.objects.update_or_create(
+                pair_address=record.pair_address,
+                defaults={**defaults, 'fingerprint': digest},
+            )
+            changes, previous = live_changes(None, defaults), ''
+            outcome = 'inserted'
+        elif token.fingerprint != digest:
+            stored = {name: getattr(token, name) for name in COMPARED_FIELDS}
+            names = changed_fields(defaults, stored)
+            for name in names:
+                setattr(token, name, defaults[name])
+            token.fingerprint = digest
+            token.save(update_fields=[*names, 'fingerprint', 'updated_at'] if names else ['fingerprint'])
+            changes, previous = live_changes(stored, defaults), stored['recommendation']
+            outcome = 'updated'
+        else:
+            changes, outcome = {}, 'unchanged'
+        with stage('price_history'):
+            append_price_points([(token.id, record.price_usd, record.volume_24h, record.liquidity)])
+        if changes:
+            with stage('live_changes'):
+                publish_token_changes([(token.id, previous, token.recommendation, changes)])
+    if stats is not None:
+        stats[outcome] += 1
+    return token
+
+
+def upsert_token(pair_data, stats=None):
+    """Insert or update a single pair through update_or_create; None if it was rejected"""
+    with stage('validate'):
+        records = validate_pairs([pair_data])
+    if not records:
+        return None
+    return upsert_record(records[0], stats)
+
+
+# Columns rewritten on conflict; created_at keeps the original insert time and
+# price_change_7d is maintained from price history (see dex_token.history)
+UPSERT_FIELDS = [
+    'name', 'symbol', 'token_address', 'chain_id', 'dex_id',
+    'price_usd', 'price_native', 'market_cap', 'fdv', 'volume_24h', 'liquidity',
+    'price_change_24h', 'price_change_1h',
+    'buys_24h', 'sells_24h',
+    'image_url', 'website_url', 'twitter_handle', 'telegram_handle', 'discord_handle',
+    'pair_created_at', 'recommendation', 'analysis_score', 'volatility_index',
+    'stop_loss_level', 'suggested_position_size', 'updated_at',
+]
+BULK_BATCH_SIZE = 500
+# Columns that come from upstream and are compared to detect changes
+COMPARED_FIELDS = [name for name in UPSERT_FIELDS if name != 'updated_at']
+
+
+def _comparable(field, value):
+    """Normalize a value the way the database will store it"""
+    if value is None or not isinstance(field, models.DecimalField):
+        return value
+    # SQLite keeps 15 significant digits; both sides are rounded to the column scale
+    value = decimal.Context(prec=15).create_decimal_from_float(float(value))
+    return value.quantize(Decimal(1).scaleb(-field.decimal_places), context=field.context)
+
+
+_COMPARED = [
+    (name, field, isinstance(field, models.DecimalField))
+    for name, field in ((name, Token._meta.get_field(name)) for name in COMPARED_FIELDS)
+]
+
+
+def fingerprint(defaults):
+    """Compact hash of a pair's column values as the database stores them.
+
+    Stored in Token.fingerprint; an incoming pair with the same hash has
+    nothing to write.
+    """
+    text = '\x1f'.join([
+        str(_comparable(field, defaults[name]) if is_decimal else defaults[name])
+        for name, field, is_decimal in _COMPARED
+    ])
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'big', signed=True)
+
+
+def changed_fields(defaults, current):
+    """Names of the compared columns whose incoming value differs from the stored row"""
+    return [
+        name for name, field, is_decimal in _COMPARED
+        if defaults[name] != current[name]
+        and (not is_decimal or _comparable(field, defaults[name]) != _comparable(field, current[name]))
+    ]
+
+
+def _write_changed_columns(groups):
+    """UPDATE rows with only the columns that changed, one statement per set of columns.
+
+    groups maps a tuple of column names to [(id, [values...])]; the values
+    follow the names, then the fingerprint (and updated_at with any change).
+    """
+    quote = connection.ops.quote_name
+    table = quote(Token._meta.db_table)
+    with connection.cursor() as cursor:
+        for names, rows in groups.items():
+            columns = [*names, 'fingerprint', 'updated_at'] if names else ['fingerprint']
+            fields = [Token._meta.get_field(name) for name in columns]
+            assignments = ', '.join(f'{quote(field.column)} = %s' for field in fields)
+            cursor.executemany(
+                f'UPDATE {table} SET {assignments} WHERE id = %s',
+                [
+                    [field.get_db_prep_save(value, connection) for field, value in zip(fields, values)] + [pk]
+                    for pk, values in rows
+                ],
+            )
+
+
+@serialized
+@stage('upsert')
+def bulk_upsert_tokens(pairs, batch_size=BULK_BATCH_SIZE):
+    """Upsert a whole ingest cycle in one transaction.
+
+    Pairs are validated first; rejected ones go to the quarantine table.
+    Each batch loads the stored fingerprints with one narrow SELECT. Pairs
+    whose fingerprint matches are not written at all. The other existing
+    rows are loaded in full and get only their changed columns updated, and
+    new pairs are inserted with INSERT ... ON CONFLICT (pair_address) DO
+    UPDATE. Every pair, changed or not, gets a price snapshot appended.
+    On PostgreSQL the cycle is COPYed and merged instead (dex_token.pgcopy).
+    Returns a dict with inserted/updated/unchanged counts.
+    """
+    # Later duplicates of a pair win, like the per-row loop
+    incoming = {}
+    with stage('validate'):
+        records = validate_pairs(pairs)
+    for record in records:
+        incoming[record.pair_address] = record.defaults()
+
+    if connection.vendor == 'postgresql' and settings.INGEST_COPY:
+        return _copy_upsert_tokens(incoming)
+
+    stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    addresses = list(incoming)
+    observed_at = timezone.now()
+    with transaction.atomic():
+        for i in range(0, len(addresses), batch_size):
+            chunk = addresses[i:i + batch_size]
+            existing = {
+                pair_address: (token_id, digest)
+                for token_id, pair_address, digest in
+                Token.objects.filter(pair_address__in=chunk).values_list('id', 'pair_address', 'fingerprint')
+            }
+            to_insert = []
+            to_compare = {}
+            changed = {}
+            for pair_address in chunk:
+                defaults = incoming[pair_address]
+                digest = fingerprint(defaults)
+                if pair_address not in existing:
+                    stats['inserted'] += 1
+                    to_insert.append(Token(pair_address=pair_address, fingerprint=digest, **defaults))
+                    changed[pair_address] = ('', live_changes(None, defaults))
+                elif existing[pair_address][1] == digest:
+                    stats['unchanged'] += 1
+                else:
+                    to_compare[pair_address] = digest
+
+            if to_insert:
+                Token.objects.bulk_create(
+                    to_insert,
+                    batch_size=batch_size,
+                    update_conflicts=True,
+                    unique_fields=['pair_address'],
+                    update_fields=UPSERT_FIELDS + ['fingerprint'],
+                )
+
+            if to_compare:
+                # Rows written before fingerprints, or repaired since, may
+                # differ only in their fingerprint
+                groups = defaultdict(list)
+                stored_rows = Token.objects.filter(pair_address__in=to_compare).values('pair_address', *COMPARED_FIELDS)
+                for current in stored_rows:
+                    pair_address = current['pair_address']
+                    defaults = incoming[pair_address]
+                    names = tuple(changed_fields(defaults, current))
+                    values = [defaults[name] for name in names] + [to_compare[pair_address]]
+                    if names:
+                        stats['updated'] += 1
+                        values.append(observed_at)
+                        changes = live_changes(current, defaults)
+                        if changes:
+                            changed[pair_address] = (current['recommendation'], changes)
+                    else:
+                        stats['unchanged'] += 1
+                    groups[names].append((existing[pair_address][0], values))
+                _write_changed_columns(groups)
+
+            token_ids = {pair_address: token_id for pair_address, (token_id, digest) in existing.items()}
+            new_addresses = [pair_address for pair_address in chunk if pair_address not in token_ids]
+            if new_addresses:
+                token_ids.update(Token.objects.filter(pair_address__in=new_addresses).values_list('pair_address', 'id'))
+            with stage('price_history'):
+                append_price_points(
+                    [
+                        (token_ids[pair_address], incoming[pair_address]['price_usd'],
+                         incoming[pair_address]['volume_24h'], incoming[pair_address]['liquidity'])
+                        for pair_address in chunk
+                    ],
+                    observed_at,
+                )
+            if changed:
+                with stage('live_changes'):
+                    publish_token_changes([
+                        (token_ids[pair_address], previous, incoming[pair_address]['recommendation'], changes)
+                        for pair_address, (previous, changes) in changed.items()
+                    ])
+        if stats['inserted'] or stats['updated']:
+            publish_changes()
+    return stats
+
+
+def _copy_upsert_tokens(incoming):
+    """bulk_upsert_tokens on PostgreSQL: COPY into a staging table, merge with one statement.
+
+    A pair whose fingerprint differs is rewritten in full rather than
+    column by column, and counts as updated.
+    """
+    from .pgcopy import copy_price_points, merge_tokens
+
+    stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    observed_at = timezone.now()
+    with transaction.atomic():
+        merged = merge_tokens(
+            {pair_address: (defaults, fingerprint(defaults)) for pair_address, defaults in incoming.items()},
+            UPSERT_FIELDS, observed_at,
+        )
+        token_ids, changed = {}, []
+        for pair_address, token_id, inserted, written, current in merged:
+            token_ids[pair_address] = token_id
+            defaults = incoming[pair_address]
+            if inserted:
+                stats['inserted'] += 1
+                changed.append((token_id, '', defaults['recommendation'], live_changes(None, defaults)))
+            elif written:
+                stats['updated'] += 1
+                changes = live_changes(current, defaults)
+                if changes:
+                    changed.append((token_id, current['recommendation'], defaults['recommendation'], changes))
+            else:
+                stats['unchanged'] += 1
+        with stage('price_history'):
+            copy_price_points(
+                [
+                    (token_ids[pair_address], defaults['price_usd'], defaults['volume_24h'], defaults['liquidity'])
+                    for pair_address, defaults in incoming.items()
+                ],
+                observed_at,
+            )
+        if changed:
+            with stage('live_changes'):
+                publish_token_changes(changed)
+        if stats['inserted'] or stats['updated']:
+            publish_changes()
+    return stats
+
+
+def fetch_pair_batch(chain='BSC', limit=None):
+    """Crawl the raw pairs for one ingest cycle of a chain, each pair once"""
+    from .crawler import collect_pairs
+    pairs = collect_pairs(chain)
+    if pairs is None:
+        return None
+    return pairs[:limit] if limit else pairs
+
+
+def ingest_chain(chain='BSC', depth=None, fetch=None):
+    """Crawl one cycle for a chain and write it with bulk_upsert_tokens, shard by shard.
+
+    Returns the inserted/updated/unchanged counts with a report per shard
+    (see dex_token.crawler), or None if every upstream query failed. fetch
+    replaces the upstream search as in crawler.crawl.
+    """
+    from .crawler import crawl
+    return crawl([chain], fetch=fetch, depth=depth)[chain]
+
+
+def update_tokens_from_api(batched=False, chain='BSC'):
+    """Update token data from Dexscreener API
+
+    With batched=True the whole cycle is written by bulk_upsert_tokens in a
+    single transaction instead of one update_or_create per pair.
+    """
+    if batched:
+        stats = ingest_chain(chain)
+        if stats is None:
+            return False
+        return stats['inserted'] + stats['updated'] + stats['unchanged']
+
     # Fetch data from API
-    data = service.fetch_pairs('BSC')
-    if not data or 'pairs' not in data:
+    pairs = fetch_pair_batch(chain)
+    if pairs is None:
         return False
-    
+
     updated_count = 0
-    for pair_data in data['pairs'][:50]:  # Limit to 50 tokens
+    stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    for pair_data in pairs:
         try:
-            base_token = pair_data.get('baseToken', {})
-            if not base_token.get('address'):
-                continue
-            
-            # Extract additional data
-            info = pair_data.get('info', {})
-            websites = info.get('websites', [])
-            socials = info.get('socials', [])
-            txns_24h = pair_data.get('txns', {}).get('h24', {})
-            
-            # Process socials
-            twitter = next((s.get('handle') for s in socials if s.get('platform') == 'twitter'), None)
-            telegram = next((s.get('handle') for s in socials if s.get('platform') == 'telegram'), None)
-            discord = next((s.get('handle') for s in socials if s.get('platform') == 'discord'), None)
-            
-            # Calculate analysis metrics
-            score = analyzer.calculate_analysis_score(pair_data)
-            price_change_24h = float(pair_data.get('priceChange', {}).get('h24', 0))
-            recommendation = analyzer.get_recommendation(score, price_change_24h)
-            volatility = analyzer.calculate_volatility_index(pair_data)
-            
             # Update or create token
-            token, created = Token.objects.update_or_create(
-                pair_address=pair_data.get('pairAddress', ''),
-                defaults={
-                    'name': base_token.get('name', 'Unknown'),
-                    'symbol': base_token.get('symbol', 'UNK'),
-                    'token_address': base_token.get('address'),
-                    'chain_id': pair_data.get('chainId'),
-                    'dex_id': pair_data.get('dexId'),
-                    'price_usd': safe_decimal(pair_data.get('priceUsd', 0)),
-                    'price_native': safe_decimal(pair_data.get('priceNative', 0)),
-                    'market_cap': int(float(pair_data.get('marketCap', 0))),
-                    'fdv': int(float(pair_data.get('fdv', 0))) if pair_data.get('fdv') else None,
-                    'volume_24h': int(float(pair_data.get('volume', {}).get('h24', 0))),
-                    'liquidity': int(float(pair_data.get('liquidity', {}).get('usd', 0))),
-                    'price_change_24h': safe_decimal(price_change_24h),
-                    'price_change_1h': safe_decimal(pair_data.get('priceChange', {}).get('h1', 0)),
-                    'price_change_7d': safe_decimal(pair_data.get('priceChange', {}).get('h7d', 0)),
-                    'buys_24h': txns_24h.get('buys'),
-                    'sells_24h': txns_24h.get('sells'),
-                    'image_url': info.get('imageUrl'),
-                    'website_url': websites[0].get('url') if websites else None,
-                    'twitter_handle': twitter,
-                    'telegram_handle': telegram,
-                    'discord_handle': discord,
-                    'pair_created_at': datetime.fromtimestamp(pair_data.get('pairCreatedAt', 0) / 1000, tz=pytz.UTC) if pair_data.get('pairCreatedAt') else None,
-                    'recommendation': recommendation,
-                    'analysis_score': safe_decimal(score),
-                    'volatility_index': safe_decimal(volatility),
-                    'stop_loss_level': safe_decimal(float(pair_data.get('priceUsd', 0)) * 0.9),
-                    'suggested_position_size': safe_decimal('5.0') if recommendation == 'BUY' else safe_decimal('2.0'),
-                }
-            )
-            updated_count += 1
-            
-        except Exception as e:
-            print(f"Error processing token: {e}")
+            if upsert_token(pair_data, stats) is not None:
+                updated_count += 1
+
+        except Exception:
+            logger.exception('Writing pair %s failed', pair_data.get('pairAddress'))
             continue
-    
+
+    if stats['inserted'] or stats['updated']:
+        publish_changes()
     return updated_count
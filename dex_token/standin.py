@@ -0,0 +1,173 @@
+"""Local stand-in for the Dexscreener API.
+
+StandinServer serves a fixed set of pairs, recorded or synthetic, the way
+the real API does:
+
+- /latest/dex/search/?q= returns up to page_size pairs whose chain, name,
+  symbol, pair address or base token address matches the query.
+- /latest/dex/tokens/<address,address> returns the pairs of those base
+  tokens.
+
+Latency, the share of requests answered with a 500 and a rate limit
+answered with 429 and Retry-After are configurable. Every response and
+every client connection is counted, and max_in_flight records the most
+requests served at once. Point DexscreenerService at base_url (or DEXSCREENER_API_URL at
+a server started with ``manage.py standin``) to run ingestion offline.
+"""
+import json
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+PAGE_SIZE = 30  # Pairs per /search response upstream
+
+
+class StandinServer:
+    """Threaded HTTP server answering /search and /tokens from a list of pairs.
+
+    Use as a context manager, or call start() and stop().
+    """
+
+    def __init__(self, pairs, latency=0.0, error_rate=0.0, rate_limit=None, retry_after=1,
+                 page_size=PAGE_SIZE, host='127.0.0.1', port=0, seed=0):
+        self.pairs = pairs
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # Requests per second; None for unlimited
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self.rng = random.Random(seed)
+        self.counts = defaultdict(int)
+        self.in_flight = self.max_in_flight = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._index(pairs)
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/latest/dex'
+
+    def _index(self, pairs):
+        self.by_key = defaultdict(list)
+        self.by_token = defaultdict(list)
+        for pair in pairs:
+            base = pair.get('baseToken') or {}
+            for key in (pair.get('chainId'), pair.get('pairAddress'), base.get('address'),
+                        base.get('symbol'), base.get('name')):
+                if key:
+                    self.by_key[str(key).casefold()].append(pair)
+            if base.get('address'):
+                self.by_token[base['address'].casefold()].append(pair)
+
+    def search(self, query):
+        """Pairs matching query exactly on a key, else by substring of name or symbol"""
+        query = query.strip().casefold()
+        pairs = self.by_key.get(query)
+        if pairs is None:
+            pairs = [
+                pair for pair in self.pairs
+                if query in str((pair.get('baseToken') or {}).get('symbol', '')).casefold()
+                or query in str((pair.get('baseToken') or {}).get('name', '')).casefold()
+            ]
+        return pairs[:self.page_size]
+
+    def tokens(self, addresses):
+        return [pair for address in addresses for pair in self.by_token.get(address.strip().casefold(), ())]
+
+    def _admit(self):
+        """Outcome of a request before it is served: None, 'throttled' or 'error'"""
+        with self._lock:
+            self.counts['requests'] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] >= 1:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    self.counts['throttled'] += 1
+                    return 'throttled'
+                self._recent.append(now)
+            if self.error_rate and self.rng.random() < self.error_rate:
+                self.counts['errors'] += 1
+                return 'error'
+        return None
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with standin._lock:
+                    standin.counts['connections'] += 1
+
+            def do_GET(self):
+                with standin._lock:
+                    standin.in_flight += 1
+                    standin.max_in_flight = max(standin.max_in_flight, standin.in_flight)
+                try:
+                    self.serve()
+                finally:
+                    with standin._lock:
+                        standin.in_flight -= 1
+
+            def serve(self):
+                url = urlparse(self.path)
+                outcome = standin._admit()
+                if standin.latency:
+                    time.sleep(standin.latency)
+                if outcome == 'throttled':
+                    return self.reply(429, {'error': 'rate limited'}, {'Retry-After': str(standin.retry_after)})
+                if outcome == 'error':
+                    return self.reply(500, {'error': 'internal error'})
+
+                path = url.path.rstrip('/')
+                if path == '/latest/dex/search':
+                    query = parse_qs(url.query).get('q', [''])[0]
+                    pairs = standin.search(query)
+                elif path.startswith('/latest/dex/tokens/'):
+                    pairs = standin.tokens(unquote(path.rsplit('/', 1)[1]).split(','))
+                else:
+                    return self.reply(404, {'error': 'not found'})
+                with standin._lock:
+                    standin.counts['served'] += 1
+                    standin.counts['pairs'] += len(pairs)
+                self.reply(200, {'schemaVersion': '1.0.0', 'pairs': pairs})
+
+            def reply(self, status, payload, headers=None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
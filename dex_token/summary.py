@@ -0,0 +1,97 @@
+"""Dashboard summary materialized at ingest time.
+
+Ingestion rebuilds a single DashboardSnapshot row (counts per
+recommendation plus a top-N leaderboard per bucket) inside its own
+transaction, so the dashboard and recommendations pages render from one
+primary-key read however large the Token table gets. If the snapshot is
+missing, counts fall back to one grouped aggregate query.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .generation import forget_generation
+from .models import DashboardSnapshot, Token
+
+BUCKETS = [choice for choice, label in Token.RECOMMENDATION_CHOICES]
+LEADERBOARD_FIELDS = [
+    'id', 'name', 'symbol', 'price_usd', 'market_cap', 'volume_24h',
+    'price_change_24h', 'recommendation', 'analysis_score',
+]
+
+
+def leaderboard_size():
+    return getattr(settings, 'DASHBOARD_LEADERBOARD_SIZE', 50)
+
+
+def recommendation_counts():
+    """Token count per recommendation with one grouped aggregate query"""
+    counts = dict.fromkeys(BUCKETS, 0)
+    rows = Token.objects.order_by().values_list('recommendation').annotate(count=Count('id'))
+    counts.update(rows)
+    return counts
+
+
+def build_summary():
+    counts = recommendation_counts()
+    size = leaderboard_size()
+    leaderboards = {
+        bucket: list(Token.objects.filter(recommendation=bucket).values(*LEADERBOARD_FIELDS)[:size])
+        for bucket in BUCKETS
+    }
+    return {
+        'total_tokens': sum(counts.values()),
+        'counts': counts,
+        'leaderboards': leaderboards,
+    }
+
+
+def refresh_snapshot():
+    """Rebuild the snapshot and bump its generation in one transaction; see dex_token.generation"""
+    forget_generation()
+    with transaction.atomic():
+        summary = build_summary()
+        values = dict(summary, refreshed_at=timezone.now())
+        updated = DashboardSnapshot.objects.filter(pk=DashboardSnapshot.SINGLETON_ID).update(
+            generation=F('generation') + 1, **values
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    DashboardSnapshot.objects.create(pk=DashboardSnapshot.SINGLETON_ID, generation=1, **values)
+            except IntegrityError:
+                # Another writer created it first
+                DashboardSnapshot.objects.filter(pk=DashboardSnapshot.SINGLETON_ID).update(
+                    generation=F('generation') + 1, **values
+                )
+    return summary
+
+
+def _hydrate(row):
+    """Unsaved Token carrying leaderboard values, so templates see model types"""
+    return Token(**{name: Token._meta.get_field(name).to_python(value) for name, value in row.items()})
+
+
+class DashboardSummary:
+    def __init__(self, snapshot=None):
+        self.snapshot = snapshot
+        if snapshot is None:
+            self.counts = recommendation_counts()
+            self.generation = None
+        else:
+            self.counts = {bucket: snapshot.counts.get(bucket, 0) for bucket in BUCKETS}
+            self.generation = snapshot.generation
+        self.total_tokens = sum(self.counts.values())
+
+    def leaderboard(self, bucket, limit=None):
+        """Top tokens of a bucket in the default ordering"""
+        limit = limit or leaderboard_size()
+        if self.snapshot is None:
+            return list(Token.objects.filter(recommendation=bucket)[:limit])
+        return [_hydrate(row) for row in self.snapshot.leaderboards.get(bucket, [])[:limit]]
+
+
+def get_summary():
+    """Summary from the snapshot row, or live queries if there is none yet"""
+    return DashboardSummary(DashboardSnapshot.objects.filter(pk=DashboardSnapshot.SINGLETON_ID).first())
@@ -0,0 +1,24 @@
+from celery import shared_task
+
+from .history import rollup_all
+from .models import IngestRun
+from .scheduler import run_due, run_ingest
+
+
+@shared_task(ignore_result=True)
+def ingest_chain_task(chain):
+    """Scheduled ingest of one chain; skipped if a run is already in flight"""
+    stats, status = run_ingest(chain, trigger=IngestRun.SCHEDULE)
+    return status
+
+
+@shared_task(ignore_result=True)
+def run_due_ingests():
+    """Ingest every chain whose cadence has elapsed"""
+    return run_due()
+
+
+@shared_task(ignore_result=True)
+def rollup_price_history():
+    """Roll new price snapshots into 5m/1h/1d candles"""
+    return rollup_all()
@@ -0,0 +1,284 @@
+"""Rate limiting, retries and a circuit breaker for Dexscreener calls.
+
+Every request goes through call(). It takes a token from the rate limiter
+of its endpoint (the first path segment, e.g. 'search'), shared by every
+thread of the process, waiting at most `wait` seconds for one. Transient
+failures (any requests error, e.g. a refused connection, a timeout or a
+body cut short, and 429 and 5xx responses) are retried
+DEXSCREENER_RETRIES times with full-jitter exponential backoff, honouring
+Retry-After. After DEXSCREENER_BREAKER_FAILURES transient failures in a
+row the breaker opens and every call fails at once with
+UpstreamUnavailable for DEXSCREENER_BREAKER_RESET seconds; then a single
+probe request decides whether it closes again.
+
+Limiters and the breaker are per process: with several workers, divide
+the upstream limit between them. upstream_status() reports their state,
+and every attempt is recorded in the dex_upstream_* metrics.
+"""
+import math
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .metrics import observe_upstream, upstream_refused
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_RATE_LIMIT = 60  # requests per minute for endpoints without a configured limit
+
+
+class UpstreamUnavailable(requests.RequestException):
+    """Raised without a request when the breaker is open or the limiter wait is too long"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TransientError(requests.RequestException):
+    """A retryable response: 429 or 5xx"""
+
+    def __init__(self, response):
+        super().__init__(f'{response.status_code} from {response.url}', response=response)
+
+
+class TokenBucket:
+    """Thread-safe token bucket of `rate` tokens per second, holding up to `burst`.
+
+    A caller that has to wait reserves its token first, so waiting callers
+    are served in arrival order and never exceed the rate together.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.updated_at = clock()
+        self.granted = self.rejected = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, timeout=None):
+        """Take a token, waiting up to timeout seconds; False if that is not enough"""
+        with self._lock:
+            self._refill(self.clock())
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if timeout is not None and wait > timeout:
+                self.rejected += 1
+                return False
+            self.tokens -= 1
+            self.granted += 1
+            self.waited += wait
+        if wait:
+            self.sleep(wait)
+        return True
+
+    def state(self):
+        with self._lock:
+            self._refill(self.clock())
+            return {
+                'rate_per_minute': round(self.rate * 60, 2),
+                'burst': self.burst,
+                'available': round(max(self.tokens, 0), 2),
+                'queued': math.ceil(max(-self.tokens, 0)),
+                'granted': self.granted,
+                'rejected': self.rejected,
+                'waited_seconds': round(self.waited, 3),
+            }
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failures, reset_timeout, clock=time.monotonic):
+        self.threshold = failures
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trips = 0
+        self.short_circuited = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a request may go upstream now; half open lets one probe through"""
+        with self._lock:
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def retry_after(self):
+        """Seconds until the breaker lets a probe through; 0 unless open"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0
+            return max(0.0, self.reset_timeout - (self.clock() - self.opened_at))
+
+    def release(self):
+        """Give back a probe that never reached upstream"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+                self.trips += 1
+            self._probing = False
+
+    def snapshot(self):
+        retry_after = self.retry_after()
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'trips': self.trips,
+                'short_circuited': self.short_circuited,
+                'retry_after': round(retry_after, 1),
+            }
+
+
+def backoff_delay(attempt, response=None, rng=random):
+    """Full-jitter exponential delay before retry number attempt (0-based).
+
+    A Retry-After header in seconds is honoured as the minimum.
+    """
+    delay = rng.uniform(0, min(settings.DEXSCREENER_BACKOFF_MAX, settings.DEXSCREENER_BACKOFF * 2 ** attempt))
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, float(retry_after))
+    return delay
+
+
+_limiters = {}
+_breaker = None
+_lock = threading.Lock()
+
+
+def endpoint_name(path):
+    """Limiter key of a request path: its first segment, e.g. /search/ -> search"""
+    return path.strip('/').split('/', 1)[0] or '/'
+
+
+def get_limiter(endpoint):
+    """The process-wide TokenBucket of an endpoint"""
+    with _lock:
+        limiter = _limiters.get(endpoint)
+        if limiter is None:
+            per_minute = settings.DEXSCREENER_RATE_LIMITS.get(endpoint, DEFAULT_RATE_LIMIT)
+            limiter = _limiters[endpoint] = TokenBucket(per_minute / 60, settings.DEXSCREENER_RATE_BURST)
+        return limiter
+
+
+def get_breaker():
+    """The process-wide CircuitBreaker for Dexscreener"""
+    global _breaker
+    with _lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(settings.DEXSCREENER_BREAKER_FAILURES, settings.DEXSCREENER_BREAKER_RESET)
+        return _breaker
+
+
+def upstream_available():
+    """False while the breaker is open, so callers can go straight to stored data"""
+    return get_breaker().retry_after() == 0
+
+
+def call(path, request, wait=None):
+    """Run request() -> Response for an endpoint path under the limiter, retries and breaker.
+
+    Returns the successful response; raises UpstreamUnavailable without a
+    request, TransientError or another RequestException once retries are
+    exhausted, or HTTPError for other error statuses. Exceptions that are
+    not RequestExceptions propagate at once.
+    """
+    wait = settings.DEXSCREENER_RATE_WAIT if wait is None else wait
+    endpoint = endpoint_name(path)
+    breaker = get_breaker()
+    limiter = get_limiter(endpoint)
+    for attempt in range(settings.DEXSCREENER_RETRIES + 1):
+        if not breaker.allow():
+            upstream_refused(endpoint, 'breaker_open')
+            raise UpstreamUnavailable('Dexscreener circuit breaker is open', retry_after=breaker.retry_after())
+        if not limiter.acquire(wait):
+            breaker.release()
+            upstream_refused(endpoint, 'rate_limited')
+            raise UpstreamUnavailable(f'Rate limit for {endpoint} reached')
+        response = None
+        settled = False
+        start = time.perf_counter()
+        try:
+            try:
+                response = request()
+                observe_upstream(endpoint, response.status_code, time.perf_counter() - start)
+                if response.status_code in RETRY_STATUSES:
+                    raise TransientError(response)
+            except requests.RequestException as e:
+                if response is None:
+                    observe_upstream(endpoint, e.__class__.__name__, time.perf_counter() - start)
+                breaker.record_failure()
+                settled = True
+                if attempt == settings.DEXSCREENER_RETRIES:
+                    raise
+                delay = backoff_delay(attempt, response)
+                if delay > settings.DEXSCREENER_BACKOFF_MAX:
+                    raise
+                time.sleep(delay)
+                continue
+            # Any other status came from a reachable upstream
+            breaker.record_success()
+            settled = True
+        finally:
+            if not settled:
+                # request() raised something else: do not keep a half-open probe taken
+                breaker.release()
+        response.raise_for_status()
+        return response
+
+
+def upstream_status():
+    """Breaker and per-endpoint limiter state for monitoring"""
+    with _lock:
+        limiters = dict(_limiters)
+    return {
+        'breaker': get_breaker().snapshot(),
+        'limiters': {endpoint: limiter.state() for endpoint, limiter in sorted(limiters.items())},
+    }
+
+
+@receiver(setting_changed)
+def _reset_upstream(setting, **kwargs):
+    global _breaker
+    if setting.startswith('DEXSCREENER_'):
+        with _lock:
+            _limiters.clear()
+            _breaker = None
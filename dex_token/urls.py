@@ -14,8 +14,16 @@ urlpatterns = [
     
     # API endpoints
     path('api/tokens/', views.TokenListAPIView.as_view(), name='api_tokens'),
+    path('api/tokens/export/', views.export_tokens, name='api_tokens_export'),
     path('api/tokens/<int:pk>/', views.TokenDetailAPIView.as_view(), name='api_token_detail'),
+    path('api/tokens/<int:pk>/history/', views.token_history, name='api_token_history'),
+    path('api/stream/', views.token_stream, name='api_token_stream'),
     path('api/recommendations/', views.RecommendationsAPIView.as_view(), name='api_recommendations'),
     path('api/update-tokens/', views.update_tokens, name='api_update_tokens'),
     path('api/update-token/<int:token_id>/', views.update_single_token, name='api_update_single_token'),
+    path('api/upstream/', views.upstream_status, name='api_upstream_status'),
+    path('api/checker/', views.checker_lookup, name='api_checker'),
+
+    # Prometheus scrape target
+    path('metrics', views.metrics, name='metrics'),
 ]
@@ -0,0 +1,185 @@
+"""Ingest-time validation of decoded pairs.
+
+Every decoded PairRecord is checked against the Token columns before it is
+written. Records that cannot be trusted (no pair address, no base token,
+a price that is missing, not a finite positive number or too large for
+the column) are rejected into the QuarantinedPair table with the raw
+payload. Everything else is clamped to what its column can hold: decimals
+are rounded to the column scale and limited to its digits, counters are
+kept non-negative and within the integer range, scores within 0-100 and
+text within max_length. Corrupt values therefore never reach Token.
+
+The same limits drive the set-based repair of rows already stored; see
+dex_token.repair.
+"""
+import json
+import math
+from datetime import timedelta
+from decimal import Context, Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+from .decoder import PairRecord, decode_pair
+from .models import QuarantinedPair, Token
+
+INTEGER_RANGES = {
+    models.BigIntegerField: (-2 ** 63, 2 ** 63 - 1),
+    models.IntegerField: (-2 ** 31, 2 ** 31 - 1),
+}
+# Domain limits on top of the column types
+NON_NEGATIVE = ('market_cap', 'fdv', 'volume_24h', 'liquidity', 'buys_24h', 'sells_24h',
+                'price_native', 'stop_loss_level', 'suggested_position_size', 'volatility_index')
+SCORE_RANGE = {'analysis_score': (Decimal(0), Decimal(100))}
+
+
+def column_limits(field):
+    """(low, high) a Token number column can hold, or None for other columns"""
+    name = field.name
+    if name in SCORE_RANGE:
+        return SCORE_RANGE[name]
+    if isinstance(field, models.DecimalField):
+        high = Decimal(10) ** (field.max_digits - field.decimal_places) - Decimal(1).scaleb(-field.decimal_places)
+        low = -high
+    elif type(field) in INTEGER_RANGES:
+        low, high = INTEGER_RANGES[type(field)]
+    else:
+        return None
+    return (0 if name in NON_NEGATIVE else low), high
+
+
+# Column name -> (field, low, high) for the numbers, max_length for the text
+NUMBER_LIMITS = {}
+TEXT_LIMITS = {}
+for _name in PairRecord.FIELDS:
+    _field = Token._meta.get_field(_name)
+    _limits = column_limits(_field)
+    if _limits is not None:
+        NUMBER_LIMITS[_name] = (_field, *_limits)
+    elif isinstance(_field, models.CharField) and _field.max_length:
+        TEXT_LIMITS[_name] = _field.max_length
+
+
+class Rejected(Exception):
+    """A pair that cannot be stored; the message is the quarantine reason"""
+
+
+# Stored prices must lie in (PRICE_RANGE[0], PRICE_RANGE[1]]; shared with the
+# repair of stored rows, which rejects the same prices in SQL
+PRICE_RANGE = (Decimal(0), NUMBER_LIMITS['price_usd'][2])
+
+
+def valid_price(price):
+    """True for a finite Decimal price_usd can hold: above 0 and at most the column maximum"""
+    low, high = PRICE_RANGE
+    return price.is_finite() and low < price <= high
+
+
+def check_price(pair_data):
+    """Raise Rejected unless priceUsd is a finite positive number the column can hold"""
+    raw = pair_data.get('priceUsd')
+    if raw is None or raw == '':
+        raise Rejected('priceUsd missing')
+    try:
+        price = Decimal(str(raw))
+    except (InvalidOperation, ValueError):
+        raise Rejected(f'priceUsd not a number: {str(raw)[:50]}')
+    if not valid_price(price):
+        if price.is_finite() and price > PRICE_RANGE[1]:
+            raise Rejected(f'priceUsd too large for price_usd: {raw}')
+        raise Rejected(f'priceUsd not a finite positive number: {raw}')
+
+
+def clamp_number(name, value):
+    """value limited to the column range and, for decimals, rounded to its scale"""
+    if value is None:
+        return None
+    field, low, high = NUMBER_LIMITS[name]
+    if isinstance(field, models.DecimalField):
+        if value.__class__ is not Decimal:
+            value = Decimal(repr(value)) if isinstance(value, float) else Decimal(value)
+        if not value.is_finite():
+            return None if field.null else Decimal(0)
+        value = min(max(value, low), high)
+        return value.quantize(Decimal(1).scaleb(-field.decimal_places), context=Context(prec=field.max_digits))
+    if isinstance(value, float) and not math.isfinite(value):
+        return None if field.null else 0
+    return min(max(int(value), low), high)
+
+
+def clean_record(record):
+    """Clamp a decoded record in place; returns the names of the columns that changed"""
+    clamped = []
+    for name in NUMBER_LIMITS:
+        value = getattr(record, name)
+        try:
+            cleaned = clamp_number(name, value)
+        except (InvalidOperation, TypeError, ValueError):
+            cleaned = None if NUMBER_LIMITS[name][0].null else 0
+        setattr(record, name, cleaned)
+        if cleaned != value:
+            clamped.append(name)
+    for name, max_length in TEXT_LIMITS.items():
+        value = getattr(record, name)
+        if value is not None and len(value) > max_length:
+            setattr(record, name, value[:max_length])
+            clamped.append(name)
+    return clamped
+
+
+def validate_pair(pair_data):
+    """Decode, check and clamp one raw pair; raises Rejected"""
+    if not isinstance(pair_data, dict):
+        raise Rejected('pair is not an object')
+    try:
+        record = decode_pair(pair_data)
+    except Exception as e:
+        raise Rejected(f'decode error: {e}')
+    if record is None:
+        raise Rejected('baseToken.address missing')
+    if not record.pair_address:
+        raise Rejected('pairAddress missing')
+    if len(record.pair_address) > Token._meta.get_field('pair_address').max_length:
+        raise Rejected('pairAddress too long')
+    check_price(pair_data)
+    clean_record(record)
+    return record
+
+
+def _json_safe(payload):
+    # NaN and Infinity are not valid JSON for every backend; keep them as text
+    return json.loads(json.dumps(payload, default=str), parse_constant=str)
+
+
+def quarantine(rejected):
+    """Store (raw pair, reason) tuples and prune entries past the retention window"""
+    now = timezone.now()
+    QuarantinedPair.objects.bulk_create(
+        [
+            QuarantinedPair(
+                pair_address=str(pair_data.get('pairAddress') or '')[:100] if isinstance(pair_data, dict) else '',
+                chain_id=str(pair_data.get('chainId') or '')[:50] if isinstance(pair_data, dict) else '',
+                reason=reason[:200],
+                payload=_json_safe(pair_data),
+                received_at=now,
+            )
+            for pair_data, reason in rejected
+        ],
+        batch_size=500,
+    )
+    retention = timedelta(days=settings.QUARANTINE_RETENTION_DAYS)
+    QuarantinedPair.objects.filter(received_at__lt=now - retention).delete()
+
+
+def validate_pairs(pairs):
+    """Valid PairRecords of a batch of raw pairs; the rejected ones are quarantined"""
+    records, rejected = [], []
+    for pair_data in pairs:
+        try:
+            records.append(validate_pair(pair_data))
+        except Rejected as e:
+            rejected.append((pair_data, str(e)))
+    if rejected:
+        quarantine(rejected)
+    return records
@@ -1,68 +1,242 @@
+import hashlib
+import logging
+import math
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from django.db import models
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from rest_framework import generics, filters
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
 from django.utils.decorators import method_decorator
-from .models import Token
-from .serializers import TokenSerializer, TokenListSerializer
-from .services import update_tokens_from_api
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
+from . import checker
+from .cache import get_search_cache
+from .export import FORMATS, astream_export, export_fields, export_queryset, stream_export
+from .generation import current_state
+from .history import INTERVAL_SECONDS, pick_interval, price_history
+from .live import changes_since, get_broadcaster, stream_events
+from .metrics import render as render_metrics
+from .models import IngestRun, Token
+from .pagination import TokenPagination
+from .serializers import TokenSerializer, TokenListSerializer, get_values_encoder
+from .refresh import RefreshTimeout
+from .scheduler import run_ingest
+from .summary import get_summary
+from .upstream import get_breaker, upstream_available, upstream_status as get_upstream_status
+
+logger = logging.getLogger(__name__)
+
+def _validator(request, *parts):
+    """Strong ETag for one representation of the data identified by parts.
+
+    Responses differ by query string, negotiated format and, for pages
+    embedding a CSRF token, the client's CSRF cookie.
+    """
+    key = [
+        request.path,
+        sorted(request.GET.lists()),
+        request.META.get('HTTP_ACCEPT', ''),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        *parts,
+    ]
+    return hashlib.sha256(repr(key).encode()).hexdigest()
+
+def _data_state(request):
+    # Shared by the ETag and Last-Modified callbacks of one request
+    if not hasattr(request, '_data_state'):
+        request._data_state = current_state()
+    return request._data_state
+
+def data_etag(request, *args, **kwargs):
+    """ETag of views over the whole table; changes on every ingest"""
+    return _validator(request, _data_state(request)['generation'])
+
+def data_last_modified(request, *args, **kwargs):
+    return _data_state(request)['updated_at']
+
+def _token_updated_at(request, pk):
+    # Shared by the ETag and Last-Modified callbacks of one request
+    if not hasattr(request, '_token_updated_at'):
+        request._token_updated_at = Token.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    return request._token_updated_at
+
+def token_etag(request, pk=None, token_id=None):
+    updated_at = _token_updated_at(request, pk or token_id)
+    return _validator(request, pk or token_id, updated_at.isoformat()) if updated_at else None
+
+def token_last_modified(request, pk=None, token_id=None):
+    return _token_updated_at(request, pk or token_id)
+
+data_conditional = condition(etag_func=data_etag, last_modified_func=data_last_modified)
+token_conditional = condition(etag_func=token_etag, last_modified_func=token_last_modified)
 
 # API Views
-class TokenListAPIView(generics.ListAPIView):
+class ValuesSerializerMixin:
+    """Serve list and detail from values() rows of the requested columns.
+
+    ?fields=a,b limits the response to those serializer fields. Rows are
+    encoded by a ValuesEncoder, so the output matches serializer_class
+    without building model or serializer instances.
+    """
+    fields_query_param = 'fields'
+
+    def get_field_names(self):
+        encoder = get_values_encoder(self.get_serializer_class())
+        return encoder, encoder.select(self.request.query_params.get(self.fields_query_param))
+
+    def list(self, request, *args, **kwargs):
+        encoder, names = self.get_field_names()
+        queryset = self.filter_queryset(self.get_queryset())
+        # Pagination cursors need the id and the ordering column of each row
+        ordering = queryset.query.order_by or queryset.model._meta.ordering[:1]
+        columns = dict.fromkeys([*names, 'id', *(name.lstrip('-') for name in ordering)])
+        rows = queryset.values(*columns)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(encoder.encode(page, names))
+        return Response(encoder.encode(rows, names))
+
+    def retrieve(self, request, *args, **kwargs):
+        encoder, names = self.get_field_names()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).values(*names)
+        row = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return Response(encoder.encode([row], names)[0])
+
+@method_decorator(data_conditional, name='get')
+class TokenListAPIView(ValuesSerializerMixin, generics.ListAPIView):
     queryset = Token.objects.all()
     serializer_class = TokenListSerializer
+    pagination_class = TokenPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['recommendation', 'symbol']
     search_fields = ['name', 'symbol']
     ordering_fields = ['analysis_score', 'volume_24h', 'market_cap', 'price_change_24h']
     ordering = ['-analysis_score']
 
-class TokenDetailAPIView(generics.RetrieveAPIView):
+@method_decorator(token_conditional, name='get')
+class TokenDetailAPIView(ValuesSerializerMixin, generics.RetrieveAPIView):
     queryset = Token.objects.all()
     serializer_class = TokenSerializer
 
-class RecommendationsAPIView(generics.ListAPIView):
+@method_decorator(data_conditional, name='get')
+class RecommendationsAPIView(ValuesSerializerMixin, generics.ListAPIView):
     serializer_class = TokenListSerializer
+    pagination_class = TokenPagination
     
     def get_queryset(self):
         return Token.objects.filter(recommendation='BUY').order_by('-analysis_score')
 
+@api_view(['GET'])
+def token_history(request, pk):
+    """Price history for a token; ?start=&end= ISO timestamps, ?interval=raw|5m|1h|1d"""
+    token = get_object_or_404(Token.objects.only('id'), pk=pk)
+    end = parse_datetime(request.GET.get('end', '')) or timezone.now()
+    start = parse_datetime(request.GET.get('start', '')) or end - timedelta(days=1)
+    interval = request.GET.get('interval') or pick_interval(start, end) or 'raw'
+    if interval not in ('raw', *INTERVAL_SECONDS):
+        return Response({'error': f"Unknown interval '{interval}'"}, status=400)
+
+    points = price_history(token.id, start, end, None if interval == 'raw' else interval)
+    return Response({'token': token.id, 'interval': interval, 'start': start, 'end': end, 'points': points})
+
 @api_view(['POST'])
 @csrf_exempt
 def update_tokens(request):
-    """Manually trigger token data update"""
+    """Manually trigger token data update
+
+    Concurrent requests share one in-flight refresh, and a refresh that
+    finished within REFRESH_FRESHNESS_SECONDS is returned as is.
+    """
 
     try:
-        count = update_tokens_from_api()
-        return Response({'success': True, 'updated_count': count})
+        stats, status = run_ingest('BSC', trigger=IngestRun.API, wait=True)
+        count = stats['inserted'] + stats['updated'] + stats['unchanged'] if stats else False
+        return Response({'success': True, 'updated_count': count, 'refresh': status})
+    except RefreshTimeout as e:
+        return Response({'success': False, 'error': str(e)}, status=503)
     except Exception as e:
         return Response({'success': False, 'error': str(e)}, status=500)
 
+def export_tokens(request):
+    """Stream the Token table as NDJSON or CSV.
+
+    ?format=ndjson|csv, ?fields= as in the API, and ?recommendation= /
+    ?symbol= to export a subset.
+    """
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return JsonResponse({'error': f"Unknown format '{fmt}'"}, status=400)
+    try:
+        names = export_fields(request.GET.get('fields'))
+    except ValidationError as e:
+        return JsonResponse({'error': e.detail}, status=400)
+
+    stream = astream_export if isinstance(request, ASGIRequest) else stream_export
+    response = StreamingHttpResponse(
+        stream(export_queryset(request.GET), fmt, names),
+        content_type=FORMATS[fmt],
+    )
+    response['Content-Disposition'] = f'attachment; filename="tokens.{fmt}"'
+    return response
+
+async def token_stream(request):
+    """Server-Sent Events with per-token deltas as ingestion changes them.
+
+    ?token=1,2 and/or ?recommendation=BUY,HOLD filter the stream; a token
+    leaving a bucket is still sent to that bucket's subscribers. Serve it
+    from the ASGI application.
+    """
+    try:
+        token_ids = {int(value) for value in request.GET.get('token', '').split(',') if value}
+    except ValueError:
+        return JsonResponse({'error': 'token must be a comma separated list of ids'}, status=400)
+    buckets = {value for value in request.GET.get('recommendation', '').upper().split(',') if value}
+    if not buckets <= {choice for choice, label in Token.RECOMMENDATION_CHOICES}:
+        return JsonResponse({'error': 'Unknown recommendation'}, status=400)
+
+    broadcaster = get_broadcaster()
+    subscription = broadcaster.subscribe(token_ids, buckets)
+    replay = []
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    if last_event_id.isdigit():
+        try:
+            replay = await sync_to_async(changes_since)(int(last_event_id), token_ids, buckets)
+        except Exception:
+            broadcaster.unsubscribe(subscription)
+            raise
+
+    response = StreamingHttpResponse(stream_events(subscription, broadcaster, replay),
+                                     content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 # Template Views
+@data_conditional
 def dashboard(request):
     """Dashboard view"""
     try:
-        top_tokens = Token.objects.filter(recommendation='BUY')[:10]
-        total_tokens = Token.objects.count()
-        buy_recommendations = Token.objects.filter(recommendation='BUY').count()
-        hold_recommendations = Token.objects.filter(recommendation='HOLD').count()
-        avoid_recommendations = Token.objects.filter(recommendation='AVOID').count()
-        
+        summary = get_summary()
         context = {
-            'top_tokens': top_tokens,
-            'total_tokens': total_tokens,
-            'buy_recommendations': buy_recommendations,
-            'hold_recommendations': hold_recommendations,
-            'avoid_recommendations': avoid_recommendations,
+            'top_tokens': summary.leaderboard('BUY', 10),
+            'total_tokens': summary.total_tokens,
+            'buy_recommendations': summary.counts['BUY'],
+            'hold_recommendations': summary.counts['HOLD'],
+            'avoid_recommendations': summary.counts['AVOID'],
         }
         return render(request, 'tokens/dashboard.html', context)
-    except Exception as e:
-        # Clear corrupted data and redirect
-        Token.objects.all().delete()
+    except Exception:
+        logger.exception('Loading the dashboard failed')
         context = {
             'top_tokens': [],
             'total_tokens': 0,
@@ -72,6 +246,7 @@ def dashboard(request):
         }
         return render(request, 'tokens/dashboard.html', context)
 
+@data_conditional
 def token_explorer(request):
     """Token explorer view"""
     try:
@@ -80,6 +255,7 @@ def token_explorer(request):
     except Exception as e:
         return render(request, 'tokens/explorer.html', {'tokens': []})
 
+@token_conditional
 def token_detail(request, token_id):
     """Token detail view"""
     try:
@@ -92,67 +268,99 @@ def token_detail(request, token_id):
             'token_id': token_id
         })
 
+@data_conditional
 def recommendations(request):
     """Recommendations view"""
     try:
-        buy_tokens = Token.objects.filter(recommendation='BUY').order_by('-analysis_score')
-        hold_tokens = Token.objects.filter(recommendation='HOLD').order_by('-analysis_score')[:10]
-        
+        summary = get_summary()
         context = {
-            'buy_tokens': buy_tokens,
-            'hold_tokens': hold_tokens,
+            'buy_tokens': summary.leaderboard('BUY'),
+            'hold_tokens': summary.leaderboard('HOLD', 10),
+            'buy_count': summary.counts['BUY'],
+            'hold_count': summary.counts['HOLD'],
         }
         return render(request, 'tokens/recommendations.html', context)
     except Exception as e:
         context = {
             'buy_tokens': [],
             'hold_tokens': [],
+            'buy_count': 0,
+            'hold_count': 0,
         }
         return render(request, 'tokens/recommendations.html', context)
 
-def token_checker(request):
-    """Token checker view"""
+CHECKER_MESSAGES = {
+    checker.NOT_FOUND: "Token not found for '{query}'. The token may not exist or is not available on supported DEXs.",
+    checker.UNAVAILABLE: (
+        "Token not found for '{query}' in stored data, and Dexscreener is "
+        "temporarily unavailable. Please try again shortly."
+    ),
+}
+
+async def token_checker(request):
+    """Token checker view; never waits on upstream longer than CHECKER_DEADLINE, see dex_token.checker"""
     token = None
     search_query = request.GET.get('search', '').strip()
     search_type = request.GET.get('type', 'name')
     error_message = None
     from_database = False
-    
+    pending = False
+
     if search_query:
         try:
-            # First, search in database
-            if search_type == 'address':
-                token = Token.objects.filter(
-                    models.Q(token_address__iexact=search_query) | 
-                    models.Q(pair_address__iexact=search_query)
-                ).first()
-            else:
-                token = Token.objects.filter(
-                    models.Q(name__icontains=search_query) | 
-                    models.Q(symbol__iexact=search_query)
-                ).first()
-            
-            if token:
-                from_database = True
-            else:
-                # If not found in database, fetch from API
-                from .services import fetch_and_analyze_token
-                token = fetch_and_analyze_token(search_query, search_type)
-                
-                if not token:
-                    error_message = f"Token not found for '{search_query}'. The token may not exist or is not available on supported DEXs."
-                
+            status, token, from_database = await checker.check(search_query, search_type)
+            pending = status == checker.PENDING
+            if status in CHECKER_MESSAGES:
+                error_message = CHECKER_MESSAGES[status].format(query=search_query)
         except Exception as e:
             error_message = f"Error searching for token: {str(e)}"
-    
+
     context = {
         'token': token,
         'search_query': search_query,
         'search_type': search_type,
         'error_message': error_message,
         'from_database': from_database,
+        'pending': pending,
     }
-    return render(request, 'tokens/checker.html', context)
+    return await sync_to_async(render)(request, 'tokens/checker.html', context)
+
+async def checker_lookup(request):
+    """Poll target of a pending checker search: found, pending (202), not_found (404) or unavailable (503)"""
+    search_query = request.GET.get('search', '').strip()
+    search_type = request.GET.get('type', 'name')
+    if not search_query:
+        return JsonResponse({'error': 'search is required'}, status=400)
+
+    status, token, from_database = await checker.check(search_query, search_type)
+    body = {'status': status}
+    if token is not None:
+        body.update(from_database=from_database, token=TokenSerializer(token).data)
+    if status in CHECKER_MESSAGES:
+        body['error'] = CHECKER_MESSAGES[status].format(query=search_query)
+    response = JsonResponse(body, status={
+        checker.FOUND: 200, checker.PENDING: 202, checker.NOT_FOUND: 404, checker.UNAVAILABLE: 503,
+    }[status])
+    if status == checker.UNAVAILABLE:
+        response['Retry-After'] = str(math.ceil(get_breaker().retry_after()))
+    return response
+
+def _stored_token_response(token):
+    """503 carrying the stored token while the upstream circuit breaker is open"""
+    return Response(
+        {
+            'success': False,
+            'error': 'Dexscreener is temporarily unavailable; showing stored data',
+            'token': TokenSerializer(token).data,
+        },
+        status=503,
+        headers={'Retry-After': str(math.ceil(get_breaker().retry_after()))},
+    )
+
+@api_view(['GET'])
+def upstream_status(request):
+    """Circuit breaker, rate limiter and search cache state for monitoring"""
+    return Response({**get_upstream_status(), 'search_cache': get_search_cache().stats()})
 
 @api_view(['POST'])
 @csrf_exempt
@@ -161,21 +369,30 @@ def update_single_token(request, token_id):
 
     try:
         token = get_object_or_404(Token, id=token_id)
+        if not upstream_available():
+            return _stored_token_response(token)
         from .services import fetch_and_analyze_token
         
         # Try to update using the token symbol first, then name
         updated_token = fetch_and_analyze_token(token.symbol, 'name')
-        if not updated_token:
+        if not updated_token and upstream_available():
             updated_token = fetch_and_analyze_token(token.name, 'name')
             
         if updated_token:
             return Response({'success': True, 'message': 'Token updated successfully'})
+        elif not upstream_available():
+            return _stored_token_response(token)
         else:
             return Response({'success': False, 'error': 'Failed to fetch updated data'}, status=400)
             
     except Exception as e:
         return Response({'success': False, 'error': str(e)}, status=500)
 
+def metrics(request):
+    """Prometheus metrics of every worker process; see dex_token.metrics"""
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
 def about(request):
     """About view"""
     return render(request, 'tokens/about.html')
@@ -0,0 +1,118 @@
+"""Single-writer queue for ingest writes.
+
+SQLite has one writer at a time. In WAL mode readers never wait for it,
+but writers that overlap wait on the database lock, polling until
+SQLITE_BUSY_TIMEOUT runs out and then failing with "database is locked".
+
+write(func, *args) hands func to the process's writer thread, which runs
+queued jobs one at a time, and returns func's result or raises its
+exception; functions decorated with @serialized always go through it. Each job also holds an exclusive lock file in STATE_DIR.
+Workers, Celery and management commands on the host therefore take turns
+instead of contending for the database lock.
+
+func runs inline, on the caller's connection, when the caller is already
+inside an atomic block: it must see and join that transaction. It also
+runs inline when DB_SINGLE_WRITER is off, the default on databases with
+concurrent writers.
+"""
+import fcntl
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+LOCK_FILE = 'db_writer.lock'
+
+
+class WriteTimeout(Exception):
+    """Raised when the host's writer lock could not be acquired in time"""
+
+
+class WriteQueue:
+    POLL_INTERVAL = 0.05
+
+    def __init__(self):
+        self.jobs = queue.SimpleQueue()
+        self.thread = None
+        self.completed = 0
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+                self.thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs); returns a Future of its result"""
+        future = Future()
+        self.jobs.put((future, func, args, kwargs))
+        self._ensure_thread()
+        return future
+
+    def _acquire(self, lock_file):
+        deadline = time.monotonic() + settings.DB_WRITE_TIMEOUT
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise WriteTimeout('Timed out waiting for the database writer lock')
+                time.sleep(self.POLL_INTERVAL)
+
+    def _run(self):
+        while True:
+            future, func, args, kwargs = self.jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            result = error = None
+            try:
+                close_old_connections()
+                state_dir = Path(settings.STATE_DIR)
+                state_dir.mkdir(parents=True, exist_ok=True)
+                with open(state_dir / LOCK_FILE, 'a') as lock_file:
+                    self._acquire(lock_file)
+                    try:
+                        result = func(*args, **kwargs)
+                    finally:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+            except BaseException as e:
+                error = e
+            # Like the end of a request: release the connection between jobs
+            close_old_connections()
+            self.completed += 1
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def on_writer_thread(self):
+        return threading.current_thread() is self.thread
+
+
+_queue = WriteQueue()
+
+
+def get_write_queue():
+    return _queue
+
+
+def write(func, *args, **kwargs):
+    """Run func(*args, **kwargs) as the only database writer of the host; see the module docstring"""
+    if not settings.DB_SINGLE_WRITER or connection.in_atomic_block or _queue.on_writer_thread():
+        return func(*args, **kwargs)
+    return _queue.submit(func, *args, **kwargs).result()
+
+
+def serialized(func):
+    """Decorator routing every call of func through write()"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return write(func, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,9 @@
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dex_trading.settings')
+
+app = Celery('dex_trading')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,23 @@
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the suite with STATE_DIR in a temporary directory.
+
+    Lock and state files written by the tests (refresh coordinators, the
+    writer lock) never touch the STATE_DIR of a development checkout.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.state_dir = tempfile.TemporaryDirectory(prefix='dex-test-state-')
+        self.state_override = override_settings(STATE_DIR=self.state_dir.name)
+        self.state_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.state_override.disable()
+        self.state_dir.cleanup()
+        super().teardown_test_environment(**kwargs)